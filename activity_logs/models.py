@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from core.database import Base
@@ -15,4 +15,8 @@ class ActivityLog(Base):
     changes = Column(JSON)
     created_at = Column(DateTime, default=datetime.utcnow)
 
-    user = relationship("User", back_populates="activities")
\ No newline at end of file
+    user = relationship("User", back_populates="activities")
+
+    __table_args__ = (
+        Index("ix_activity_logs_entity", "entity_type", "entity_id", "created_at"),
+    )
\ No newline at end of file
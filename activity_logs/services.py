@@ -0,0 +1,205 @@
+import enum
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from decouple import config
+from sqlalchemy import event, insert, inspect
+from sqlalchemy.orm import Session
+from core.database import engine
+from projects.models import Project, ProjectUserRole
+from tasks.models import Task
+from comments.models import Comment
+from .models import ActivityLog
+
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_LOG_QUEUE_SIZE = config("ACTIVITY_LOG_QUEUE_SIZE", default=10000, cast=int)
+ACTIVITY_LOG_BATCH_SIZE = config("ACTIVITY_LOG_BATCH_SIZE", default=500, cast=int)
+ACTIVITY_LOG_FLUSH_INTERVAL = config("ACTIVITY_LOG_FLUSH_INTERVAL", default=2.0, cast=float)
+
+TRACKED_MODELS = {
+    Project: "project",
+    Task: "task",
+    Comment: "comment",
+    ProjectUserRole: "project_user_role",
+}
+
+_STOP = object()
+
+
+def _json_value(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class ActivityLogWriter:
+    """Buffers activity log rows in a bounded queue and writes them in multi-row INSERTs."""
+
+    def __init__(self, maxsize: int, batch_size: int, flush_interval: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = None
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.flushes = 0
+        self.flush_failures = 0
+        self.last_flush_duration = 0.0
+
+    def record(self, entry: dict):
+        # Вызывается из after_commit, в том числе AsyncSession, то есть в потоке event loop:
+        # ждать место в очереди нельзя, при переполнении запись отбрасывается
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+            return
+        self.enqueued += 1
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="activity-log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        if self._thread is None:
+            return
+        # Блокирующий put: на остановке важнее дописать лог, чем не ждать
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def stats(self):
+        return {
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "written": self.written,
+            "flushes": self.flushes,
+            "flush_failures": self.flush_failures,
+            "last_flush_duration": self.last_flush_duration,
+        }
+
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                entry = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                entry = None
+            if entry is _STOP:
+                self._flush(batch)
+                return
+            if entry is not None:
+                batch.append(entry)
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._flush(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+    def _flush(self, batch):
+        if not batch:
+            return
+        started = time.perf_counter()
+        try:
+            with engine.begin() as connection:
+                connection.execute(insert(ActivityLog).values(batch))
+        except Exception:
+            self.flush_failures += 1
+            logger.exception("Failed to write %d activity log entries", len(batch))
+            return
+        finally:
+            self.last_flush_duration = time.perf_counter() - started
+        self.flushes += 1
+        self.written += len(batch)
+
+
+activity_writer = ActivityLogWriter(ACTIVITY_LOG_QUEUE_SIZE, ACTIVITY_LOG_BATCH_SIZE, ACTIVITY_LOG_FLUSH_INTERVAL)
+
+
+def log_activity(user_id: int, entity_type: str, entity_id: int, action: str, changes: dict = None):
+    activity_writer.record({
+        "user_id": user_id,
+        "entity_type": entity_type,
+        "entity_id": entity_id,
+        "action": action,
+        "changes": changes,
+        "created_at": datetime.utcnow(),
+    })
+
+
+def _entity_id(obj):
+    # У ProjectUserRole составной ключ: логируем по проекту, пользователь попадает в changes
+    if isinstance(obj, ProjectUserRole):
+        return obj.project_id
+    return obj.id
+
+
+def _column_values(obj):
+    return {attr.key: _json_value(attr.value) for attr in inspect(obj).attrs if attr.key in obj.__table__.columns}
+
+
+def _column_changes(obj):
+    changes = {}
+    for attr in inspect(obj).attrs:
+        if attr.key not in obj.__table__.columns:
+            continue
+        history = attr.history
+        if history.has_changes():
+            old = history.deleted[0] if history.deleted else None
+            new = history.added[0] if history.added else None
+            changes[attr.key] = [_json_value(old), _json_value(new)]
+    if changes and isinstance(obj, ProjectUserRole):
+        changes.setdefault("user_id", [obj.user_id, obj.user_id])
+    return changes
+
+
+@event.listens_for(Session, "after_flush")
+def collect_activity(session, flush_context):
+    actor_id = session.info.get("actor_id")
+    if actor_id is None:
+        return
+    pending = session.info.setdefault("activity_log", [])
+    now = datetime.utcnow()
+    for action, objects in (("create", session.new), ("update", session.dirty), ("delete", session.deleted)):
+        for obj in objects:
+            entity_type = TRACKED_MODELS.get(type(obj))
+            if entity_type is None:
+                continue
+            if action == "create":
+                changes = _column_values(obj)
+            elif action == "update":
+                changes = _column_changes(obj)
+                if not changes:
+                    continue
+            else:
+                changes = {"user_id": obj.user_id} if isinstance(obj, ProjectUserRole) else None
+            pending.append({
+                "user_id": actor_id,
+                "entity_type": entity_type,
+                "entity_id": _entity_id(obj),
+                "action": action,
+                "changes": changes,
+                "created_at": now,
+            })
+
+
+@event.listens_for(Session, "after_commit")
+def enqueue_activity(session):
+    for entry in session.info.pop("activity_log", ()):
+        activity_writer.record(entry)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_activity(session):
+    session.info.pop("activity_log", None)
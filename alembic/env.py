@@ -4,12 +4,14 @@ from logging.config import fileConfig
 from core.database import Base, SQLALCHEMY_DATABASE_URL
 
 # Импорт всех моделей
-from users.models import User, BlacklistedToken
+from users.models import User
 from activity_logs.models import ActivityLog
-from projects.models import Project, project_users, ProjectUserRole
-from tasks.models import Task
+from projects.models import Project, project_users, ProjectUserRole, ProjectCounter
+from tasks.models import Task, TaskCounter
 from comments.models import Comment
 from roles.models import Role, Permission, role_permissions
+from outbox.models import OutboxEmail
+from core.models import JobLease
 
 # fileConfig, target_metadata = Base.metadata, run_migrations_online() — всё как обычно
 
@@ -29,6 +31,16 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
 
+
+def include_name(name, type_, parent_names):
+    # FTS5-таблица поиска и ее служебные таблицы создаются миграцией вручную (search.models)
+    if type_ == "table":
+        return not name.startswith("search_index")
+    if type_ == "index":
+        return name not in ("ix_tasks_search", "ix_comments_search")
+    return True
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -53,6 +65,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_name=include_name,
     )
 
     with context.begin_transaction():
@@ -74,7 +87,7 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, include_name=include_name
         )
 
         with context.begin_transaction():
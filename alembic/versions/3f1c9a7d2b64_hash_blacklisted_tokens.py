@@ -0,0 +1,65 @@
+"""hash blacklisted tokens
+
+Revision ID: 3f1c9a7d2b64
+Revises: 969c26f1fe75
+Create Date: 2026-10-18 10:12:41.508133
+
+"""
+from typing import Sequence, Union
+from datetime import datetime, timedelta
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7d2b64'
+down_revision: Union[str, Sequence[str], None] = '969c26f1fe75'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Срок жизни токена из utils.helpers.generate_token
+TOKEN_LIFETIME = timedelta(seconds=600)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('blacklisted_tokens') as batch_op:
+        batch_op.add_column(sa.Column('token_hash', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('expires_at', sa.DateTime(), nullable=True))
+
+    # Переносим существующие записи: хэш токена и срок истечения
+    bind = op.get_bind()
+    seen = set()
+    rows = bind.execute(sa.text("SELECT id, token, created_at FROM blacklisted_tokens")).fetchall()
+    for row_id, token, created_at in rows:
+        token_hash = hashlib.sha256(token.encode()).hexdigest()
+        if token_hash in seen:
+            bind.execute(sa.text("DELETE FROM blacklisted_tokens WHERE id = :id"), {"id": row_id})
+            continue
+        seen.add(token_hash)
+        if isinstance(created_at, str):
+            created_at = datetime.fromisoformat(created_at)
+        bind.execute(
+            sa.text("UPDATE blacklisted_tokens SET token_hash = :token_hash, expires_at = :expires_at WHERE id = :id"),
+            {"token_hash": token_hash, "expires_at": (created_at or datetime.utcnow()) + TOKEN_LIFETIME, "id": row_id},
+        )
+
+    with op.batch_alter_table('blacklisted_tokens') as batch_op:
+        batch_op.alter_column('token_hash', existing_type=sa.String(length=64), nullable=False)
+        batch_op.alter_column('expires_at', existing_type=sa.DateTime(), nullable=False)
+        batch_op.drop_column('token')
+        batch_op.create_index(batch_op.f('ix_blacklisted_tokens_token_hash'), ['token_hash'], unique=True)
+        batch_op.create_index(batch_op.f('ix_blacklisted_tokens_expires_at'), ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Исходные токены по хэшу не восстановить, поэтому записи удаляются
+    op.execute("DELETE FROM blacklisted_tokens")
+    with op.batch_alter_table('blacklisted_tokens') as batch_op:
+        batch_op.drop_index(batch_op.f('ix_blacklisted_tokens_expires_at'))
+        batch_op.drop_index(batch_op.f('ix_blacklisted_tokens_token_hash'))
+        batch_op.add_column(sa.Column('token', sa.String(), nullable=False))
+        batch_op.drop_column('expires_at')
+        batch_op.drop_column('token_hash')
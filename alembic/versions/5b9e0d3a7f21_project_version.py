@@ -0,0 +1,28 @@
+"""project version
+
+Revision ID: 5b9e0d3a7f21
+Revises: c2f8a6d95e14
+Create Date: 2026-10-18 18:55:30.664981
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '5b9e0d3a7f21'
+down_revision: Union[str, Sequence[str], None] = 'c2f8a6d95e14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('projects', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('projects') as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,29 @@
+"""project soft delete
+
+Revision ID: 7455f64dbbbe
+Revises: a788e30c60dc
+Create Date: 2026-10-18 19:37:24.644446
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7455f64dbbbe'
+down_revision: Union[str, Sequence[str], None] = 'a788e30c60dc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('projects', sa.Column('is_deleted', sa.Boolean(), server_default=sa.false(), nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('projects') as batch_op:
+        batch_op.drop_column('is_deleted')
@@ -0,0 +1,116 @@
+"""full text search
+
+Revision ID: c2f8a6d95e14
+Revises: e2b7f4a91c38
+Create Date: 2026-10-18 17:48:52.116304
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2f8a6d95e14'
+down_revision: Union[str, Sequence[str], None] = 'e2b7f4a91c38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SQLITE_UPGRADE = [
+    """
+    CREATE VIRTUAL TABLE search_index USING fts5(
+        task_id UNINDEXED, title, body, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER tasks_search_insert AFTER INSERT ON tasks WHEN NEW.is_deleted = 0 BEGIN
+        INSERT INTO search_index(rowid, task_id, title, body)
+        VALUES (NEW.id * 2, NEW.id, NEW.title, coalesce(NEW.description, ''));
+    END
+    """,
+    """
+    CREATE TRIGGER tasks_search_update AFTER UPDATE OF title, description, is_deleted ON tasks BEGIN
+        DELETE FROM search_index WHERE rowid = OLD.id * 2;
+        INSERT INTO search_index(rowid, task_id, title, body)
+        SELECT NEW.id * 2, NEW.id, NEW.title, coalesce(NEW.description, '') WHERE NEW.is_deleted = 0;
+    END
+    """,
+    """
+    CREATE TRIGGER tasks_search_delete AFTER DELETE ON tasks BEGIN
+        DELETE FROM search_index WHERE rowid = OLD.id * 2;
+    END
+    """,
+    """
+    CREATE TRIGGER comments_search_insert AFTER INSERT ON comments WHEN NEW.is_deleted = 0 BEGIN
+        INSERT INTO search_index(rowid, task_id, title, body)
+        VALUES (NEW.id * 2 + 1, NEW.task_id, '', NEW.text);
+    END
+    """,
+    """
+    CREATE TRIGGER comments_search_update AFTER UPDATE OF text, is_deleted ON comments BEGIN
+        DELETE FROM search_index WHERE rowid = OLD.id * 2 + 1;
+        INSERT INTO search_index(rowid, task_id, title, body)
+        SELECT NEW.id * 2 + 1, NEW.task_id, '', NEW.text WHERE NEW.is_deleted = 0;
+    END
+    """,
+    """
+    CREATE TRIGGER comments_search_delete AFTER DELETE ON comments BEGIN
+        DELETE FROM search_index WHERE rowid = OLD.id * 2 + 1;
+    END
+    """,
+    """
+    INSERT INTO search_index(rowid, task_id, title, body)
+    SELECT id * 2, id, title, coalesce(description, '') FROM tasks WHERE is_deleted = 0
+    """,
+    """
+    INSERT INTO search_index(rowid, task_id, title, body)
+    SELECT id * 2 + 1, task_id, '', text FROM comments WHERE is_deleted = 0
+    """,
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER comments_search_delete",
+    "DROP TRIGGER comments_search_update",
+    "DROP TRIGGER comments_search_insert",
+    "DROP TRIGGER tasks_search_delete",
+    "DROP TRIGGER tasks_search_update",
+    "DROP TRIGGER tasks_search_insert",
+    "DROP TABLE search_index",
+]
+
+POSTGRESQL_UPGRADE = [
+    """
+    CREATE INDEX ix_tasks_search ON tasks USING gin ((
+        setweight(to_tsvector('simple', title), 'A') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+    )) WHERE is_deleted = false
+    """,
+    "CREATE INDEX ix_comments_search ON comments USING gin ((to_tsvector('simple', text))) WHERE is_deleted = false",
+]
+
+POSTGRESQL_DOWNGRADE = [
+    "DROP INDEX ix_comments_search",
+    "DROP INDEX ix_tasks_search",
+]
+
+
+def _execute(statements):
+    for statement in statements:
+        op.execute(sa.text(statement))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == 'sqlite':
+        _execute(SQLITE_UPGRADE)
+    else:
+        _execute(POSTGRESQL_UPGRADE)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'sqlite':
+        _execute(SQLITE_DOWNGRADE)
+    else:
+        _execute(POSTGRESQL_DOWNGRADE)
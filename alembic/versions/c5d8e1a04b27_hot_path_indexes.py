@@ -0,0 +1,37 @@
+"""hot path indexes
+
+Revision ID: c5d8e1a04b27
+Revises: 8a4e2d6c1f93
+Create Date: 2026-10-18 15:02:33.871240
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d8e1a04b27'
+down_revision: Union[str, Sequence[str], None] = '8a4e2d6c1f93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_tasks_project_id_live', 'tasks', ['project_id', 'id'], unique=False,
+                    sqlite_where=sa.text('is_deleted = 0'), postgresql_where=sa.text('is_deleted = false'))
+    op.create_index('ix_tasks_assignee_id_deadline', 'tasks', ['assignee_id', 'deadline'], unique=False)
+    op.create_index('ix_comments_task_id_live', 'comments', ['task_id', 'id'], unique=False,
+                    sqlite_where=sa.text('is_deleted = 0'), postgresql_where=sa.text('is_deleted = false'))
+    op.create_index('ix_project_user_roles_project_id_status', 'project_user_roles', ['project_id', 'status'], unique=False)
+    op.create_index('ix_activity_logs_entity', 'activity_logs', ['entity_type', 'entity_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_activity_logs_entity', table_name='activity_logs')
+    op.drop_index('ix_project_user_roles_project_id_status', table_name='project_user_roles')
+    op.drop_index('ix_comments_task_id_live', table_name='comments')
+    op.drop_index('ix_tasks_assignee_id_deadline', table_name='tasks')
+    op.drop_index('ix_tasks_project_id_live', table_name='tasks')
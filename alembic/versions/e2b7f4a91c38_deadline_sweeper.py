@@ -0,0 +1,34 @@
+"""deadline sweeper
+
+Revision ID: e2b7f4a91c38
+Revises: c5d8e1a04b27
+Create Date: 2026-10-18 16:21:09.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b7f4a91c38'
+down_revision: Union[str, Sequence[str], None] = 'c5d8e1a04b27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('job_leases',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('holder', sa.String(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.create_index('ix_tasks_deadline_status', 'tasks', ['deadline', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tasks_deadline_status', table_name='tasks')
+    op.drop_table('job_leases')
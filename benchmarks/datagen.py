@@ -0,0 +1,174 @@
+"""Synthetic data for benchmarks.
+
+Fills a database with users, projects, memberships, tasks and comments using
+multi-row Core INSERTs, so even large scales seed in seconds. The generator is
+seeded, the same ``Scale`` always produces the same data.
+
+    python -m benchmarks.datagen --database /tmp/bench.db --projects 100 --tasks-per-project 500
+"""
+import argparse
+import os
+import random
+import time
+from dataclasses import dataclass, asdict, field
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select
+
+PASSWORD = "bench-password"
+CHUNK_SIZE = 500
+
+
+@dataclass
+class Scale:
+    users: int = 1000
+    projects: int = 50
+    members_per_project: int = 10
+    tasks_per_project: int = 200
+    comments_per_task: int = 3
+    seed: int = 42
+
+
+@dataclass
+class Dataset:
+    """Ids the benchmark scenarios need to address the seeded rows."""
+    scale: Scale
+    user_ids: list = field(default_factory=list)
+    # user_id -> username; email is f"{username}@example.com"
+    usernames: dict = field(default_factory=dict)
+    # project_id -> owner_id
+    owners: dict = field(default_factory=dict)
+    # project_id -> set of member user ids, owner included
+    members: dict = field(default_factory=dict)
+    seconds: float = 0.0
+
+
+def use_database(path: str):
+    """Points the app at ``path``; must run before anything imports core.database."""
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ.setdefault("MAIL_BACKEND", "memory")
+
+
+def _insert_chunks(connection, table, rows):
+    for start in range(0, len(rows), CHUNK_SIZE):
+        connection.execute(insert(table).values(rows[start:start + CHUNK_SIZE]))
+
+
+def seed(scale: Scale) -> Dataset:
+    import main  # noqa: F401 — регистрирует все модели в Base.metadata
+    from core.database import Base, engine
+    from roles.services import seed_roles, role_registry
+    from utils.permissions import load_permission_table
+    from utils.helpers import hash_password
+    from users.models import User
+    from projects.models import Project, ProjectUserRole, MembershipStatus
+    from tasks.models import Task, TaskStatus
+    from comments.models import Comment
+    from projects.counters import recompute_counters
+
+    started = time.perf_counter()
+    rng = random.Random(scale.seed)
+    now = datetime.utcnow()
+    dataset = Dataset(scale)
+
+    Base.metadata.create_all(engine)
+    seed_roles()
+    load_permission_table()
+    owner_role_id = role_registry.ids["owner"]
+    member_role_id = role_registry.ids["member"]
+    # Один bcrypt-хэш на всех: пароли одинаковые, а хэшировать тысячи раз незачем
+    password_hash = hash_password(PASSWORD)
+
+    with engine.begin() as connection:
+        _insert_chunks(connection, User.__table__, [
+            {
+                "username": f"user{i}", "email": f"user{i}@example.com", "password_hash": password_hash,
+                "is_active": True, "is_deleted": False, "created_at": now
+            }
+            for i in range(scale.users)
+        ])
+        dataset.usernames = dict(connection.execute(select(User.id, User.username).order_by(User.id)).all())
+        dataset.user_ids = list(dataset.usernames)
+
+        _insert_chunks(connection, Project.__table__, [
+            {"name": f"project {i}", "owner_id": rng.choice(dataset.user_ids)}
+            for i in range(scale.projects)
+        ])
+        dataset.owners = dict(connection.execute(select(Project.id, Project.owner_id).order_by(Project.id)).all())
+
+        memberships = []
+        for project_id, owner_id in dataset.owners.items():
+            members = {owner_id}
+            memberships.append({
+                "user_id": owner_id, "project_id": project_id, "role_id": owner_role_id,
+                "status": MembershipStatus.accepted, "joined_at": now
+            })
+            others = [user_id for user_id in rng.sample(dataset.user_ids, min(scale.members_per_project + 1, scale.users))
+                      if user_id != owner_id][:scale.members_per_project]
+            for user_id in others:
+                members.add(user_id)
+                memberships.append({
+                    "user_id": user_id, "project_id": project_id, "role_id": member_role_id,
+                    "status": MembershipStatus.accepted, "joined_at": now
+                })
+            dataset.members[project_id] = members
+        _insert_chunks(connection, ProjectUserRole.__table__, memberships)
+
+        statuses = list(TaskStatus)
+        for project_id, members in dataset.members.items():
+            members = sorted(members)
+            _insert_chunks(connection, Task.__table__, [
+                {
+                    "title": f"task {i} of project {project_id}",
+                    "description": f"synthetic task {i} " + rng.choice(("backend", "frontend", "infra", "docs")),
+                    "status": rng.choice(statuses),
+                    "deadline": now + timedelta(days=rng.randint(-30, 60)),
+                    "created_at": now,
+                    "is_deleted": False,
+                    "author_id": rng.choice(members),
+                    "assignee_id": rng.choice(members),
+                    "project_id": project_id,
+                }
+                for i in range(scale.tasks_per_project)
+            ])
+            task_ids = connection.execute(select(Task.id).where(Task.project_id == project_id)).scalars().all()
+            _insert_chunks(connection, Comment.__table__, [
+                {
+                    "text": f"comment {j} on task {task_id}",
+                    "created_at": now,
+                    "is_deleted": False,
+                    "task_id": task_id,
+                    "author_id": rng.choice(members),
+                }
+                for task_id in task_ids
+                for j in range(scale.comments_per_task)
+            ])
+
+        # Core INSERT идут мимо ORM-событий, счетчики строим одним пересчетом
+        recompute_counters(connection)
+
+    dataset.seconds = time.perf_counter() - started
+    return dataset
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database", required=True, help="path of the SQLite file to create")
+    for name, value in asdict(Scale()).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=value)
+    args = vars(parser.parse_args())
+    use_database(args.pop("database"))
+
+    dataset = seed(Scale(**args))
+    scale = dataset.scale
+    print(
+        f"seeded {scale.users} users, {scale.projects} projects, "
+        f"{sum(len(members) for members in dataset.members.values())} memberships, "
+        f"{scale.projects * scale.tasks_per_project} tasks, "
+        f"{scale.projects * scale.tasks_per_project * scale.comments_per_task} comments "
+        f"in {dataset.seconds:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Login throughput under concurrent load.
+
+Runs the real app in-process against a throwaway SQLite database and fires
+concurrent ``/login`` requests while a probe coroutine measures event loop lag.
+With bcrypt offloaded the lag stays near zero; when hashing ran on the loop
+every login stalled all other requests.
+
+    python -m benchmarks.login_throughput --requests 200 --concurrency 20
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from core.database import Base, get_async_db
+from main import app
+
+
+def use_temporary_database(path):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    session_factory = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    return async_engine
+
+
+async def measure_loop_lag(stop: asyncio.Event, interval=0.01):
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - started - interval)
+    return worst
+
+
+async def run(path: str, requests: int, concurrency: int):
+    engine = use_temporary_database(path)
+    try:
+        await drive_logins(requests, concurrency)
+    finally:
+        await engine.dispose()
+
+
+async def drive_logins(requests: int, concurrency: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        credentials = {"username": "bench", "password_hash": "bench-password"}
+        await client.post("/register", json={
+            "email": "bench@example.com", "confirm_password": credentials["password_hash"], **credentials
+        })
+
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def login():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/login", json=credentials)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        stop = asyncio.Event()
+        probe = asyncio.create_task(measure_loop_lag(stop))
+        started = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        worst_lag = await probe
+
+    latencies.sort()
+    print(f"requests:        {requests} (concurrency {concurrency})")
+    print(f"throughput:      {requests / elapsed:.1f} logins/s")
+    print(f"p50 latency:     {latencies[len(latencies) // 2] * 1000:.1f} ms")
+    print(f"p95 latency:     {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms")
+    print(f"worst loop lag:  {worst_lag * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(os.path.join(directory, "bench.db"), args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
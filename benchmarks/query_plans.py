@@ -0,0 +1,161 @@
+"""Query plans of the hot endpoints.
+
+Points the app at a throwaway SQLite database, seeds several projects with
+tasks, comments and members, drives the read and invite endpoints in-process and
+records every SELECT they issue. Each statement is then run through
+``EXPLAIN QUERY PLAN``; a full ``SCAN`` of a data table means one of the
+indexes from the models' ``__table_args__`` is missing or no longer matches
+the query, and the script exits non-zero. tests/test_query_plans.py runs it
+as part of the test suite.
+
+    python -m benchmarks.query_plans --projects 10 --tasks 2000
+"""
+import argparse
+import asyncio
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+
+from sqlalchemy import event, text
+
+# Небольшие справочники, их полное чтение при загрузке кэшей ожидаемо
+SCAN_ALLOWED = {"permissions", "roles", "role_permissions"}
+# FTS5 отвечает на MATCH своим индексом, в плане это SCAN ... VIRTUAL TABLE INDEX.
+# SCAN ... USING [COVERING] INDEX - это тоже проход по всей таблице, только в порядке индекса
+FULL_SCAN = re.compile(r"^SCAN (\w+)\b(?! VIRTUAL TABLE)")
+
+
+def configure(path):
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ.setdefault("MAIL_BACKEND", "memory")
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+
+def seed(tasks: int, comments_per_task: int):
+    import main  # noqa: F401 — регистрирует все модели в Base.metadata
+    from core.database import Base, engine, SessionLocal
+    from roles.services import seed_roles
+    from utils.permissions import load_permission_table
+    from tasks.models import Task
+    from comments.models import Comment
+
+    Base.metadata.create_all(engine)
+    seed_roles()
+    load_permission_table()
+
+    def fill(project_id, author_id):
+        with SessionLocal() as db:
+            for start in range(0, tasks, 500):
+                batch = [
+                    Task(title=f"task {i}", project_id=project_id, author_id=author_id, is_deleted=i % 10 == 0)
+                    for i in range(start, min(start + 500, tasks))
+                ]
+                db.add_all(batch)
+                db.flush()
+                db.add_all([
+                    Comment(text="comment", task_id=task.id, author_id=author_id)
+                    for task in batch for _ in range(comments_per_task)
+                ])
+            db.commit()
+            db.execute(text("ANALYZE"))
+
+    return fill
+
+
+async def capture_statements(projects: int, members: int, fill):
+    import httpx
+    from core.database import async_engine
+    from main import app
+
+    statements = []
+
+    @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://plans") as client:
+            # Посторонние пользователи: приглашенные должны быть малой долей таблицы, как в жизни
+            for i in range(members * 5 + 1):
+                await client.post("/register", json={
+                    "username": f"user{i}", "email": f"user{i}@example.com",
+                    "password_hash": "password", "confirm_password": "password"
+                })
+            token = (await client.post("/login", json={
+                "username": "user0", "password_hash": "password"
+            })).json()["access_token"]
+            headers = {"Authorization": f"Bearer {token}"}
+            # Планировщик опирается на статистику: с единственным проектом
+            # полный проход по таблицам дешевле любого индекса
+            for i in range(projects):
+                project_id = (await client.post("/create-project", json={"name": f"plans {i}"}, headers=headers)).json()["project_id"]
+                fill(project_id, 1)
+
+            statements.clear()
+            await client.post(f"/projects/{project_id}/invite", json={"email": "user1@example.com"}, headers=headers)
+            await client.post(f"/projects/{project_id}/invite/bulk", json={
+                "emails": [f"user{i}@example.com" for i in range(2, members + 1)]
+            }, headers=headers)
+            await client.get(f"/projects/{project_id}", headers=headers)
+            await client.get(f"/projects/{project_id}/summary", headers=headers)
+            page = (await client.get(f"/projects/{project_id}/tasks", headers=headers)).json()
+            await client.get(f"/projects/{project_id}/tasks", params={"cursor": page["next_cursor"]}, headers=headers)
+            task_id = page["items"][1]["id"]
+            await client.get(f"/projects/{project_id}/tasks/{task_id}/comments", headers=headers)
+            await client.get(f"/projects/{project_id}/search", params={"q": "task 15"}, headers=headers)
+    finally:
+        await async_engine.dispose()
+    return statements
+
+
+def explain(path, statements):
+    failures = []
+    seen = set()
+    connection = sqlite3.connect(path)
+    try:
+        for statement, parameters in statements:
+            if statement in seen:
+                continue
+            seen.add(statement)
+            plan = [row[3] for row in connection.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+            scans = [
+                detail for detail in plan
+                if (match := FULL_SCAN.match(detail)) and match.group(1) not in SCAN_ALLOWED
+            ]
+            print(" ".join(statement.split())[:120])
+            for detail in plan:
+                print(f"    {'!! ' if detail in scans else ''}{detail}")
+            if scans:
+                failures.append(statement)
+    finally:
+        connection.close()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--projects", type=int, default=10)
+    parser.add_argument("--tasks", type=int, default=2000, help="tasks per project")
+    parser.add_argument("--comments-per-task", type=int, default=3)
+    parser.add_argument("--members", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "plans.db")
+        # Настройки БД читаются при импорте core.database, поэтому приложение
+        # импортируется только после подмены DATABASE_URL
+        configure(path)
+        fill = seed(args.tasks, args.comments_per_task)
+        statements = asyncio.run(capture_statements(args.projects, args.members, fill))
+        failures = explain(path, statements)
+
+    print(f"\n{len(failures)} statement(s) with full table scans")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
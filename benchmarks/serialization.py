@@ -0,0 +1,102 @@
+"""Serialization cost of the project details payload.
+
+Builds the payload of a large project from synthetic query rows (no database)
+with ``build_project_details`` and compares the ways of turning it into a
+response body: FastAPI's ``jsonable_encoder`` plus stdlib ``json`` (what the
+endpoint did before), ``orjson`` (what it does now) and validating into the
+``ProjectDetailsSchema`` response model and dumping with pydantic-core (what a
+``response_model`` route does). Reports the best time of several rounds and
+the peak memory allocated while building and serializing.
+
+    python -m benchmarks.serialization --tasks 5000 --comments-per-task 5
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from collections import namedtuple
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from projects.schemas import ProjectDetailsSchema
+from projects.services import build_project_details
+from tasks.models import TaskStatus
+
+project_details_adapter = TypeAdapter(ProjectDetailsSchema)
+
+ProjectRow = namedtuple("ProjectRow", "id name")
+MemberRow = namedtuple("MemberRow", "id username role")
+TaskRow = namedtuple("TaskRow", "id title status")
+CommentRow = namedtuple("CommentRow", "id task_id text author")
+
+
+def make_rows(tasks: int, comments_per_task: int, members: int):
+    statuses = list(TaskStatus)
+    task_rows = [TaskRow(i, f"task {i} " + "x" * 40, statuses[i % len(statuses)]) for i in range(tasks)]
+    comment_rows = [
+        CommentRow(i * comments_per_task + j, i, f"comment {j} on task {i} " + "y" * 80, f"user{j % members}")
+        for i in range(tasks) for j in range(comments_per_task)
+    ]
+    member_rows = [MemberRow(i, f"user{i}", "member") for i in range(members)]
+    return ProjectRow(1, "benchmark"), "user0", member_rows, task_rows, comment_rows
+
+
+def stdlib_json(rows):
+    return json.dumps(jsonable_encoder(build_project_details(*rows))).encode()
+
+
+def orjson_dicts(rows):
+    return orjson.dumps(build_project_details(*rows))
+
+
+def response_model(rows):
+    details = project_details_adapter.validate_python(build_project_details(*rows))
+    return project_details_adapter.dump_json(details)
+
+
+def measure(serialize, rows, rounds: int):
+    best = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        body = serialize(rows)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    serialize(rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=5000)
+    parser.add_argument("--comments-per-task", type=int, default=5)
+    parser.add_argument("--members", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.tasks, args.comments_per_task, args.members)
+    candidates = [
+        ("jsonable_encoder + json", stdlib_json),
+        ("orjson", orjson_dicts),
+        ("response model + pydantic-core", response_model),
+    ]
+
+    print(f"{args.tasks} tasks, {args.tasks * args.comments_per_task} comments, {args.members} members\n")
+    print(f"{'method':<34}{'time ms':>10}{'peak MiB':>10}{'body KiB':>10}")
+    reference = None
+    for name, serialize in candidates:
+        seconds, peak, body = measure(serialize, rows, args.rounds)
+        # Все способы должны отдавать один и тот же документ
+        document = json.loads(body)
+        reference = reference or document
+        assert document == reference, f"{name} produced a different payload"
+        print(f"{name:<34}{seconds * 1000:>10.1f}{peak / 2 ** 20:>10.1f}{len(body) / 1024:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""End-to-end benchmark suite.
+
+Seeds a throwaway SQLite database with ``benchmarks.datagen`` and drives the
+real app in-process through each scenario: register, login, project details
+(full and conditional), invites and project deletion. For every scenario it
+reports latency percentiles, throughput, errors and SQL statements per
+request, and writes the run to ``benchmarks/results/<time>-<commit>.json``
+so runs can be compared across commits:
+
+    python -m benchmarks.suite --requests 200 --concurrency 10
+    python -m benchmarks.suite --compare benchmarks/results/<earlier run>.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from datetime import datetime
+
+from sqlalchemy import event
+
+from benchmarks.datagen import Scale, PASSWORD, use_database, seed
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+class StatementCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+
+async def drive(name, calls, concurrency, counter):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def call(request):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            response = await request()
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    counter.count = 0
+    started = time.perf_counter()
+    await asyncio.gather(*(call(request) for request in calls))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "scenario": name,
+        "requests": len(calls),
+        "errors": errors,
+        "throughput": len(calls) / elapsed if elapsed else None,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "queries_per_request": counter.count / len(calls),
+    }
+
+
+def scenarios(client, dataset, requests):
+    from datetime import datetime, timedelta
+    from core.database import SessionLocal
+    from users.models import UserSession
+    from utils.helpers import generate_token, REFRESH_TOKEN_TTL
+
+    rng = random.Random(dataset.scale.seed)
+    tokens = {}
+
+    def auth(user_id):
+        # Сессия пишется напрямую: через /login каждый пользователь стоил бы хэширования bcrypt
+        if user_id not in tokens:
+            session = UserSession(
+                id=f"bench-{user_id}", user_id=user_id, refresh_jti=f"bench-{user_id}",
+                expires_at=datetime.utcnow() + timedelta(seconds=REFRESH_TOKEN_TTL)
+            )
+            with SessionLocal() as db:
+                db.merge(session)
+                db.commit()
+            tokens[user_id] = {"Authorization": f"Bearer {generate_token(user_id, 0, session.id)['access_token']}"}
+        return tokens[user_id]
+
+    projects = list(dataset.owners)
+    # Последние проекты уходят на удаление, остальные сценарии их не трогают
+    deleted = projects[-max(1, min(requests, len(projects) // 5)):]
+    projects = projects[:len(projects) - len(deleted)]
+
+    def register(i):
+        return lambda: client.post("/register", json={
+            "username": f"bench-new-{i}", "email": f"bench-new-{i}@example.com",
+            "password_hash": PASSWORD, "confirm_password": PASSWORD
+        })
+
+    def login(user_id):
+        return lambda: client.post("/login", json={"username": dataset.usernames[user_id], "password_hash": PASSWORD})
+
+    def details(project_id, headers):
+        return lambda: client.get(f"/projects/{project_id}", headers=headers)
+
+    def invite(project_id, user_id):
+        return lambda: client.post(
+            f"/projects/{project_id}/invite", json={"email": f"{dataset.usernames[user_id]}@example.com"},
+            headers=auth(dataset.owners[project_id])
+        )
+
+    def delete(project_id):
+        return lambda: client.delete(f"/projects/{project_id}", headers=auth(dataset.owners[project_id]))
+
+    invites = []
+    while len(invites) < requests:
+        project_id = rng.choice(projects)
+        user_id = rng.choice(dataset.user_ids)
+        if user_id not in dataset.members[project_id] and (project_id, user_id) not in invites:
+            invites.append((project_id, user_id))
+
+    def project_details():
+        return [
+            details(project_id, auth(dataset.owners[project_id]))
+            for project_id in rng.choices(projects, k=requests)
+        ]
+
+    async def not_modified():
+        # ETag берется из ответа, как это делает клиент, опрашивающий проект
+        calls = []
+        for project_id in rng.choices(projects, k=requests):
+            headers = auth(dataset.owners[project_id])
+            etag = (await client.get(f"/projects/{project_id}", headers=headers)).headers["etag"]
+            calls.append(details(project_id, {**headers, "If-None-Match": etag}))
+        return calls
+
+    return [
+        ("register", lambda: [register(i) for i in range(requests)]),
+        ("login", lambda: [login(user_id) for user_id in rng.choices(dataset.user_ids, k=requests)]),
+        ("project_details", project_details),
+        ("project_details_304", not_modified),
+        ("invite", lambda: [invite(project_id, user_id) for project_id, user_id in invites]),
+        ("delete_project", lambda: [delete(project_id) for project_id in deleted]),
+    ]
+
+
+async def run(scale: Scale, requests: int, concurrency: int):
+    import httpx
+    from core.database import async_engine
+    from main import app
+
+    dataset = seed(scale)
+    counter = StatementCounter(async_engine.sync_engine)
+    results = []
+    # Исключение в обработчике - это ошибка сценария (500), а не падение всего прогона
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name, build in scenarios(client, dataset, requests):
+                calls = build()
+                if asyncio.iscoroutine(calls):
+                    calls = await calls
+                results.append(await drive(name, calls, concurrency, counter))
+    finally:
+        await async_engine.dispose()
+    return dataset, results
+
+
+def print_results(results, baseline=None):
+    baseline = {result["scenario"]: result for result in (baseline or [])}
+    print(f"{'scenario':<22}{'req':>6}{'err':>5}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'sql/req':>9}")
+    for result in results:
+        print(
+            f"{result['scenario']:<22}{result['requests']:>6}{result['errors']:>5}{result['throughput']:>10.1f}"
+            f"{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}{result['p99_ms']:>10.1f}"
+            f"{result['queries_per_request']:>9.1f}"
+        )
+        previous = baseline.get(result["scenario"])
+        if previous:
+            changes = "  ".join(
+                f"{key} {(result[key] - previous[key]) / previous[key] * 100:+.0f}%"
+                for key in ("throughput", "p50_ms", "p95_ms", "p99_ms")
+                if previous[key]
+            )
+            print(f"{'':<22}vs baseline: {changes}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    for name, value in asdict(Scale()).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=value)
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--output", help="where to write the JSON results (default: benchmarks/results/)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+    scale = Scale(**{name: getattr(args, name) for name in asdict(Scale())})
+
+    with tempfile.TemporaryDirectory() as directory:
+        use_database(os.path.join(directory, "bench.db"))
+        dataset, results = asyncio.run(run(scale, args.requests, args.concurrency))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)["results"]
+    print(f"seeded in {dataset.seconds:.1f}s: {asdict(scale)}")
+    print_results(results, baseline)
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "created_at": datetime.utcnow().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "scale": asdict(scale),
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "results": results,
+    }
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{datetime.utcnow():%Y%m%d-%H%M%S}-{commit}.json")
+    with open(output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"\nresults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
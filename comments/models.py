@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey, Boolean, Index
+from sqlalchemy import text as sql_text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from core.database import Base
@@ -16,4 +17,11 @@ class Comment(Base):
     author_id = Column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
 
     task = relationship("Task", back_populates="comments")
-    author = relationship("User", back_populates="comments")
\ No newline at end of file
+    author = relationship("User", back_populates="comments")
+
+    __table_args__ = (
+        Index(
+            "ix_comments_task_id_live", "task_id", "id",
+            sqlite_where=sql_text("is_deleted = 0"), postgresql_where=sql_text("is_deleted = false")
+        ),
+    )
\ No newline at end of file
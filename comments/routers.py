@@ -0,0 +1,53 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.database import get_async_db
+from utils.pagination import paginate, ndjson_response
+from utils.permissions import require_permission
+from tasks.models import Task
+from users.models import User
+from .models import Comment
+from .shcemas import CommentPageSchema
+
+
+comment_route = APIRouter()
+
+
+def serialize_comment(row):
+    return {
+        "id": row.id,
+        "text": row.text,
+        "created_at": row.created_at,
+        "author_id": row.author_id,
+        "author": row.author
+    }
+
+
+def task_comments_statement(task_id: int):
+    return (
+        select(Comment.id, Comment.text, Comment.created_at, Comment.author_id, User.username.label("author"))
+        .join(User, User.id == Comment.author_id)
+        .where(Comment.task_id == task_id, Comment.is_deleted == False)
+    )
+
+
+@comment_route.get("/projects/{project_id}/tasks/{task_id}/comments", response_model=CommentPageSchema)
+async def list_task_comments(
+    project_id: int,
+    task_id: int,
+    cursor: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=500),
+    stream: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    _ = Depends(require_permission("read_comments"))
+):
+    task = (await db.execute(
+        select(Task.id).filter_by(id=task_id, project_id=project_id, is_deleted=False)
+    )).first()
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    if stream:
+        return ndjson_response(task_comments_statement(task_id).order_by(Comment.id), serialize_comment)
+    return await paginate(db, task_comments_statement(task_id), Comment.id, cursor, limit, serialize_comment)
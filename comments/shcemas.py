@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+
+class CommentSchema(BaseModel):
+    id: int
+    text: str
+    created_at: Optional[datetime] = None
+    author_id: int
+    author: str
+
+    class Config:
+        from_attributes = True
+
+
+class CommentPageSchema(BaseModel):
+    items: list[CommentSchema]
+    next_cursor: Optional[int] = None
@@ -1,27 +1,230 @@
+import logging
+import time
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy import event
-from sqlalchemy.engine import Engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from decouple import config
+from core.metrics import METRICS_ENABLED, SLOW_QUERY_MS, request_sql, db_query_duration, db_slow_queries
 
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./db.db"
+logger = logging.getLogger(__name__)
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+SQLALCHEMY_DATABASE_URL = config("DATABASE_URL", default="sqlite:///./db.db")
+
+# Асинхронные драйверы для тех же баз: aiosqlite локально, asyncpg в продакшене
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def to_async_url(url: str):
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+
+
+DB_POOL_SIZE = config("DB_POOL_SIZE", default=5, cast=int)
+DB_MAX_OVERFLOW = config("DB_MAX_OVERFLOW", default=10, cast=int)
+DB_POOL_TIMEOUT = config("DB_POOL_TIMEOUT", default=30, cast=int)
+DB_POOL_RECYCLE = config("DB_POOL_RECYCLE", default=1800, cast=int)
+DB_POOL_PRE_PING = config("DB_POOL_PRE_PING", default=True, cast=bool)
+DB_ECHO = config("DB_ECHO", default=False, cast=bool)
+
+SQLITE_JOURNAL_MODE = config("SQLITE_JOURNAL_MODE", default="WAL")
+SQLITE_SYNCHRONOUS = config("SQLITE_SYNCHRONOUS", default="NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = config("SQLITE_BUSY_TIMEOUT_MS", default=5000, cast=int)
+SQLITE_MMAP_SIZE = config("SQLITE_MMAP_SIZE", default=268435456, cast=int)
+
+database_url = make_url(SQLALCHEMY_DATABASE_URL)
+IS_SQLITE = database_url.get_backend_name() == "sqlite"
+
+
+def engine_options(async_driver: bool = False):
+    options = {"echo": DB_ECHO}
+    if IS_SQLITE and not async_driver:
+        options["connect_args"] = {"check_same_thread": False}
+    # In-memory SQLite живет в одном соединении, очередь пула к нему неприменима
+    if not (IS_SQLITE and database_url.database in (None, "", ":memory:")):
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=DB_POOL_PRE_PING,
+        )
+    return options
+
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_options())
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine) 
 
+async_engine = create_async_engine(to_async_url(SQLALCHEMY_DATABASE_URL), **engine_options(async_driver=True))
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 
-@event.listens_for(Engine, "connect")
 def set_sqlite_pragma(dbapi_connection, connection_record):
     cursor = dbapi_connection.cursor()
     cursor.execute("PRAGMA foreign_keys=ON")
+    # WAL: читатели не блокируются единственным писателем
+    cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
     cursor.close()
 
 
+if IS_SQLITE:
+    event.listen(engine, "connect", set_sqlite_pragma)
+    event.listen(async_engine.sync_engine, "connect", set_sqlite_pragma)
+
+
+class PoolMetrics:
+    def __init__(self):
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.peak_checked_out = 0
+
+    def attach(self, engine):
+        self.engine = engine
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self.checkouts += 1
+        if isinstance(self.engine.pool, QueuePool):
+            self.peak_checked_out = max(self.peak_checked_out, self.engine.pool.checkedout())
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        self.checkins += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        self.invalidations += 1
+
+    def stats(self):
+        pool = self.engine.pool
+        stats = {
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "invalidations": self.invalidations,
+        }
+        if isinstance(pool, QueuePool):
+            stats.update(
+                pool_size=pool.size(),
+                max_overflow=DB_MAX_OVERFLOW,
+                checked_in=pool.checkedin(),
+                checked_out=pool.checkedout(),
+                overflow=pool.overflow(),
+                peak_checked_out=self.peak_checked_out,
+            )
+        return stats
+
+
+pool_metrics = PoolMetrics()
+pool_metrics.attach(engine)
+async_pool_metrics = PoolMetrics()
+async_pool_metrics.attach(async_engine.sync_engine)
+
+
+class QueryMetrics:
+    """Times every statement; totals go to the current request and slow ones to the log."""
+
+    def __init__(self, label: str):
+        self.label = label
+
+    def attach(self, engine):
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        db_query_duration.observe(elapsed, self.label)
+        sql = request_sql.get()
+        if sql is not None:
+            sql[0] += 1
+            sql[1] += elapsed
+        if elapsed * 1000 >= SLOW_QUERY_MS:
+            db_slow_queries.inc(self.label)
+            logger.warning("Slow query (%.1f ms, %s): %s", elapsed * 1000, self.label, " ".join(statement.split())[:1000])
+
+
+# Без METRICS_ENABLED хуки не вешаются вовсе и на запросы ничего не тратится
+if METRICS_ENABLED:
+    QueryMetrics("sync").attach(engine)
+    QueryMetrics("async").attach(async_engine.sync_engine)
+
+
+def dispose_after_fork():
+    """Drops pooled connections inherited from the parent process without closing them."""
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+
+
+async def ping_database():
+    async with async_engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+
+def pool_stats():
+    return {
+        "sync": pool_metrics.stats(),
+        "async": async_pool_metrics.stats(),
+    }
+
+
 class Base(DeclarativeBase):
     pass
 
 
+def insert_ignore(session, table, rows, index_elements, returning=()):
+    """INSERT ... ON CONFLICT DO NOTHING for SQLite and PostgreSQL; returns the statement result.
+
+    With an AsyncSession the result has to be awaited. Columns in ``returning``
+    come back only for the rows actually inserted.
+    """
+    if not rows:
+        return None
+    if session.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    statement = insert(table).values(rows).on_conflict_do_nothing(index_elements=index_elements)
+    if returning:
+        statement = statement.returning(*returning)
+    return session.execute(statement)
+
+
+def upsert_increment(connection, table, rows, index_elements, column="value"):
+    """INSERT ... ON CONFLICT DO UPDATE SET column = column + excluded.column."""
+    if not rows:
+        return None
+    if connection.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    statement = insert(table).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={column: table.c[column] + statement.excluded[column]}
+    )
+    return connection.execute(statement)
+
+
 def get_db():
     db = SessionLocal()
     try:
@@ -30,11 +233,6 @@ def get_db():
         db.close()
 
 
-from sqlalchemy import event
-from sqlalchemy.engine import Engine
-
-@event.listens_for(Engine, "connect")
-def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
-    cursor = dbapi_connection.cursor()
-    cursor.execute("PRAGMA foreign_keys=ON")
-    cursor.close()
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,57 @@
+import inspect
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+class Lifecycle:
+    """Startup and shutdown hooks of a worker and the readiness they gate.
+
+    Startup hooks run in registration order, shutdown hooks in reverse, so a
+    component stops after everything that was started later (and may use it).
+    """
+
+    def __init__(self):
+        self.startup_hooks = []
+        self.shutdown_hooks = []
+        self.ready = False
+        self.draining = False
+
+    def on_startup(self, func):
+        self.startup_hooks.append(func)
+        return func
+
+    def on_shutdown(self, func):
+        self.shutdown_hooks.append(func)
+        return func
+
+    async def startup(self):
+        for hook in self.startup_hooks:
+            result = hook()
+            if inspect.isawaitable(result):
+                await result
+        self.ready = True
+
+    def drain(self):
+        # Балансировщик перестает слать запросы, пока принятые дорабатываются
+        self.ready = False
+        self.draining = True
+
+    async def shutdown(self):
+        self.drain()
+        for hook in reversed(self.shutdown_hooks):
+            try:
+                result = hook()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                logger.exception("Shutdown hook %s failed", getattr(hook, "__qualname__", hook))
+
+    def state(self):
+        if self.ready:
+            return "ready"
+        return "draining" if self.draining else "starting"
+
+
+lifecycle = Lifecycle()
@@ -0,0 +1,157 @@
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from decouple import config
+
+
+METRICS_ENABLED = config("METRICS_ENABLED", default=True, cast=bool)
+SLOW_QUERY_MS = config("SLOW_QUERY_MS", default=200, cast=float)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+JOB_DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+# SQL-статистика текущего запроса: [число запросов, секунды]; None вне HTTP-запроса
+request_sql = contextvars.ContextVar("request_sql", default=None)
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {value}"
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # labels -> [счетчики по бакетам (+Inf последним), сумма]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        names = self.labelnames + ("le",)
+        for labels, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                yield f"{self.name}_bucket{_labels(names, labels + (bound,))} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {total}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+http_requests = Counter(
+    "http_requests_total", "HTTP requests by route and status code.", ("method", "route", "status")
+)
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency.", ("method", "route")
+)
+http_request_queries = Histogram(
+    "http_request_db_queries", "SQL statements issued per HTTP request.", ("method", "route"),
+    buckets=QUERY_COUNT_BUCKETS
+)
+http_request_db_time = Histogram(
+    "http_request_db_seconds", "Time spent in SQL per HTTP request.", ("method", "route")
+)
+db_query_duration = Histogram("db_query_duration_seconds", "SQL statement latency.", ("engine",))
+db_slow_queries = Counter(
+    "db_slow_queries_total", f"SQL statements slower than SLOW_QUERY_MS ({SLOW_QUERY_MS:g} ms).", ("engine",)
+)
+scheduler_job_duration = Histogram(
+    "scheduler_job_duration_seconds", "Periodic job run duration.", ("job",), buckets=JOB_DURATION_BUCKETS
+)
+
+METRICS = (
+    http_requests, http_request_duration, http_request_queries, http_request_db_time, db_query_duration, db_slow_queries,
+    scheduler_job_duration,
+)
+
+
+def render_samples(name: str, documentation: str, kind: str, labelname: str, values: dict):
+    """Renders values that are kept elsewhere (pool, scheduler) as one metric family."""
+    yield f"# HELP {name} {documentation}"
+    yield f"# TYPE {name} {kind}"
+    for label, value in sorted(values.items()):
+        yield f"{name}{_labels((labelname,), (label,))} {value}"
+
+
+def render_metrics(*extra):
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    for collector in extra:
+        lines.extend(collector)
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware: latency, status and SQL totals per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        sql = [0, 0.0]
+        token = request_sql.set(sql)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            request_sql.reset(token)
+            # Шаблон пути, а не сам путь: иначе каждый project_id станет отдельной серией
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            method = scope["method"]
+            http_requests.inc(method, path, status_code)
+            http_request_duration.observe(elapsed, method, path)
+            http_request_queries.observe(sql[0], method, path)
+            http_request_db_time.observe(sql[1], method, path)
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, String, DateTime, Integer
+from core.database import Base
+
+
+class JobLease(Base):
+    """Lease of a periodic job: only the current holder runs it until expires_at."""
+    __tablename__ = "job_leases"
+
+    name = Column(String, primary_key=True)
+    holder = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+
+class CacheVersion(Base):
+    """Counter bumped on every change of data that each worker keeps in memory.
+
+    Workers compare it with the version they loaded and reload on mismatch.
+    """
+    __tablename__ = "cache_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0, server_default="0")
@@ -0,0 +1,212 @@
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import update, or_
+from core.database import SessionLocal, insert_ignore
+from core.models import JobLease
+from core.metrics import METRICS_ENABLED, scheduler_job_duration
+
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderLease:
+    """Row in job_leases that lets one worker out of many run a job.
+
+    The holder renews the lease on every run and, while a run is in progress,
+    every ``ttl / 3`` seconds; if it dies, another worker takes over once
+    ``ttl`` seconds have passed.
+    """
+
+    def __init__(self, name: str, ttl: float):
+        self.name = name
+        self.ttl = ttl
+
+    @property
+    def holder(self):
+        # pid берется в момент вызова: при preload воркеры форкаются из одного процесса
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def acquire(self) -> bool:
+        now = datetime.utcnow()
+        holder = self.holder
+        db = SessionLocal()
+        try:
+            insert_ignore(db, JobLease.__table__, [{"name": self.name, "holder": holder, "expires_at": now}], ["name"])
+            result = db.execute(
+                update(JobLease)
+                .where(JobLease.name == self.name, or_(JobLease.holder == holder, JobLease.expires_at <= now))
+                .values(holder=holder, expires_at=now + timedelta(seconds=self.ttl))
+            )
+            db.commit()
+            return result.rowcount == 1
+        finally:
+            db.close()
+
+    def renew(self) -> bool:
+        """Extends the lease if this process still holds it."""
+        db = SessionLocal()
+        try:
+            result = db.execute(
+                update(JobLease)
+                .where(JobLease.name == self.name, JobLease.holder == self.holder)
+                .values(expires_at=datetime.utcnow() + timedelta(seconds=self.ttl))
+            )
+            db.commit()
+            return result.rowcount == 1
+        finally:
+            db.close()
+
+    def release(self):
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(JobLease)
+                .where(JobLease.name == self.name, JobLease.holder == self.holder)
+                .values(expires_at=datetime.utcnow())
+            )
+            db.commit()
+        finally:
+            db.close()
+
+
+class PeriodicJob:
+    """Runs ``func`` every ``interval`` seconds in a daemon thread.
+
+    With ``leader=True`` the job runs in only one process at a time, see ``LeaderLease``.
+    """
+
+    def __init__(self, name: str, func, interval: float, on_stop=None, leader: bool = False):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.on_stop = on_stop
+        # Аренда переживает один пропущенный запуск, но не больше
+        self.lease = LeaderLease(name, ttl=interval * 2) if leader else None
+        self.runs = 0
+        self.skipped = 0
+        self.failures = 0
+        self.last_result = None
+        self.last_duration = 0.0
+        self.total_duration = 0.0
+        self.last_run_at = None
+        self.last_success_at = None
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+        self._thread.start()
+
+    def trigger(self):
+        """Runs the job as soon as possible instead of waiting for the interval."""
+        self._wakeup.set()
+
+    def stop(self, timeout: float = None):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self.lease is not None:
+            try:
+                self.lease.release()
+            except Exception:
+                logger.exception("Failed to release lease of job %s", self.name)
+        if self.on_stop is not None:
+            self.on_stop()
+
+    def stats(self):
+        return {
+            "interval": self.interval,
+            "runs": self.runs,
+            "skipped": self.skipped,
+            "failures": self.failures,
+            "last_result": self.last_result,
+            "last_duration": self.last_duration,
+            "total_duration": self.total_duration,
+            "last_run_at": self.last_run_at,
+            "last_success_at": self.last_success_at,
+        }
+
+    def _heartbeat(self, done: threading.Event):
+        # Длинный запуск (например, очистка большого проекта) не должен терять аренду
+        while not done.wait(self.lease.ttl / 3):
+            try:
+                if not self.lease.renew():
+                    logger.warning("Job %s lost its lease during a run", self.name)
+                    return
+            except Exception:
+                logger.exception("Failed to renew lease of job %s", self.name)
+
+    def run_once(self):
+        if self.lease is not None:
+            try:
+                is_leader = self.lease.acquire()
+            except Exception:
+                is_leader = False
+                logger.exception("Failed to acquire lease of job %s", self.name)
+            if not is_leader:
+                self.skipped += 1
+                return
+            done = threading.Event()
+            threading.Thread(target=self._heartbeat, args=(done,), name=f"{self.name}-lease", daemon=True).start()
+        started = time.perf_counter()
+        try:
+            self.last_result = self.func()
+            self.last_success_at = time.time()
+        except Exception:
+            self.failures += 1
+            logger.exception("Job %s failed", self.name)
+        finally:
+            if self.lease is not None:
+                done.set()
+            self.last_duration = time.perf_counter() - started
+            self.total_duration += self.last_duration
+            self.last_run_at = time.time()
+            self.runs += 1
+            if METRICS_ENABLED:
+                scheduler_job_duration.observe(self.last_duration, self.name)
+
+    def _loop(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            if self._stop.is_set():
+                return
+            self.run_once()
+
+
+class Scheduler:
+    def __init__(self):
+        self.jobs = {}
+
+    def add(self, job: PeriodicJob):
+        self.jobs[job.name] = job
+        return job
+
+    def start(self):
+        for job in self.jobs.values():
+            job.start()
+
+    def stop(self, timeout: float = None):
+        for job in self.jobs.values():
+            job.stop(timeout)
+
+    def trigger(self, name: str):
+        job = self.jobs.get(name)
+        if job is not None:
+            job.trigger()
+
+    def stats(self):
+        return {name: job.stats() for name, job in self.jobs.items()}
+
+
+scheduler = Scheduler()
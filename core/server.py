@@ -0,0 +1,195 @@
+"""Production entry point: N uvicorn workers forked from a preloaded app.
+
+The master imports the app once, binds the socket and forks the workers, so
+they share the imported code and listen on the same socket. Each worker drops
+the database pools inherited over fork, runs the app lifespan (``core.lifecycle``)
+and on SIGTERM/SIGINT stops accepting connections, finishes in-flight requests
+and drains the background queues. The master restarts workers that die and
+kills the ones still running GRACEFUL_TIMEOUT seconds after a shutdown.
+
+A worker that dies within WORKER_STABLE_TIME seconds of its start is a rapid
+failure: it is restarted after RESPAWN_BACKOFF seconds, doubled for every
+consecutive rapid failure up to RESPAWN_MAX_BACKOFF. After MAX_RAPID_FAILURES
+of them in a row (a broken deploy, an unreachable database) the master stops
+the remaining workers and exits with status 1.
+
+Workers share nothing but the database. The in-process caches stay per
+worker (see ``utils.permissions``). Role changes reach every worker within
+PERMISSION_TABLE_TTL seconds through the cache_versions table, a logout
+within TOKEN_VERSION_CACHE_TTL seconds. A revoked
+membership or a deleted project can still pass read checks in other workers
+for up to PERMISSION_CACHE_TTL seconds. Routes that change data always check
+permissions against the database.
+
+    python -m core.server --workers 4 --port 8000
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+
+import uvicorn
+from decouple import config
+from uvicorn.importer import import_from_string
+from core.lifecycle import lifecycle
+
+
+HOST = config("HOST", default="0.0.0.0")
+PORT = config("PORT", default=8000, cast=int)
+WEB_CONCURRENCY = config("WEB_CONCURRENCY", default=os.cpu_count() or 1, cast=int)
+GRACEFUL_TIMEOUT = config("GRACEFUL_TIMEOUT", default=30, cast=int)
+LOG_LEVEL = config("LOG_LEVEL", default="info")
+WORKER_STABLE_TIME = config("WORKER_STABLE_TIME", default=10, cast=float)
+RESPAWN_BACKOFF = config("RESPAWN_BACKOFF", default=1, cast=float)
+RESPAWN_MAX_BACKOFF = config("RESPAWN_MAX_BACKOFF", default=30, cast=float)
+MAX_RAPID_FAILURES = config("MAX_RAPID_FAILURES", default=5, cast=int)
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerServer(uvicorn.Server):
+    def __init__(self, config: uvicorn.Config, master_pid: int):
+        super().__init__(config)
+        self.master_pid = master_pid
+
+    def handle_exit(self, sig, frame):
+        lifecycle.drain()
+        super().handle_exit(sig, frame)
+
+    async def on_tick(self, counter: int) -> bool:
+        # Мастер убит без SIGTERM воркерам: сироты не должны держать сокет
+        if counter % 10 == 0 and os.getppid() != self.master_pid:
+            logger.warning("Master %s is gone, worker %s exits", self.master_pid, os.getpid())
+            self.should_exit = True
+        return await super().on_tick(counter)
+
+
+class Master:
+    def __init__(self, app: str, host: str, port: int, workers: int, graceful_timeout: int):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.graceful_timeout = graceful_timeout
+        # pid -> время запуска по time.monotonic()
+        self.children = {}
+        self.stopping = False
+        self.exit_code = 0
+        self.rapid_failures = 0
+        self._wakeup = threading.Event()
+
+    def run(self):
+        # Preload: модели, роуты и движки импортируются один раз и делятся с воркерами через fork
+        app = import_from_string(self.app)
+        sock = socket.socket(socket.AF_INET6 if ":" in self.host else socket.AF_INET)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+
+        signal.signal(signal.SIGTERM, self._shutdown)
+        signal.signal(signal.SIGINT, self._shutdown)
+        signal.signal(signal.SIGALRM, self._kill)
+        logger.info("Master %s listening on %s:%s with %s workers", os.getpid(), self.host, self.port, self.workers)
+        for _ in range(self.workers):
+            self._spawn(app, sock)
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started = self.children.pop(pid, None)
+            if self.stopping or started is None:
+                continue
+            delay = self.respawn_delay(time.monotonic() - started)
+            if delay is None:
+                logger.error("Workers keep dying right after start (%s times in a row), giving up", self.rapid_failures)
+                self.exit_code = 1
+                self._stop_workers()
+                continue
+            logger.warning("Worker %s exited with status %s, starting a new one in %.1fs", pid, status, delay)
+            # Сигнал остановки прерывает ожидание
+            self._wakeup.wait(delay)
+            if not self.stopping:
+                self._spawn(app, sock)
+        signal.alarm(0)
+        sock.close()
+        logger.info("Master %s stopped", os.getpid())
+        return self.exit_code
+
+    def respawn_delay(self, lifetime: float):
+        """Seconds to wait before replacing a worker that lived ``lifetime`` seconds, None to give up."""
+        if lifetime >= WORKER_STABLE_TIME:
+            self.rapid_failures = 0
+            return 0
+        self.rapid_failures += 1
+        if self.rapid_failures >= MAX_RAPID_FAILURES:
+            return None
+        return min(RESPAWN_BACKOFF * 2 ** (self.rapid_failures - 1), RESPAWN_MAX_BACKOFF)
+
+    def _spawn(self, app, sock):
+        master_pid = os.getpid()
+        pid = os.fork()
+        if pid:
+            self.children[pid] = time.monotonic()
+            return
+        try:
+            for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGALRM):
+                signal.signal(signum, signal.SIG_DFL)
+            # Ctrl+C в терминале получает только мастер, воркерам он шлет один SIGTERM
+            os.setpgid(0, 0)
+            from core.database import dispose_after_fork
+            dispose_after_fork()
+            server = WorkerServer(uvicorn.Config(
+                app, lifespan="on", log_level=LOG_LEVEL,
+                timeout_graceful_shutdown=self.graceful_timeout
+            ), master_pid)
+            server.run(sockets=[sock])
+        finally:
+            os._exit(0)
+
+    def _shutdown(self, signum, frame):
+        if self.stopping:
+            return
+        logger.info("Master %s got signal %s, stopping workers", os.getpid(), signum)
+        self._stop_workers()
+
+    def _stop_workers(self):
+        self.stopping = True
+        self._wakeup.set()
+        self._signal_children(signal.SIGTERM)
+        # Запас сверх таймаута воркера на остановку lifespan (scheduler, activity writer)
+        signal.alarm(self.graceful_timeout + 10)
+
+    def _kill(self, signum, frame):
+        logger.warning("Workers %s did not stop in time, killing them", sorted(self.children))
+        self._signal_children(signal.SIGKILL)
+
+    def _signal_children(self, signum):
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the app with several uvicorn worker processes.")
+    parser.add_argument("--app", default="main:app")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=WEB_CONCURRENCY)
+    parser.add_argument("--graceful-timeout", type=int, default=GRACEFUL_TIMEOUT)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=LOG_LEVEL.upper(), format="%(asctime)s %(process)d %(levelname)s %(name)s: %(message)s")
+    sys.exit(Master(args.app, args.host, args.port, args.workers, args.graceful_timeout).run())
+
+
+if __name__ == "__main__":
+    main()
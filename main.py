@@ -1,19 +1,139 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, status
 from users.routers import auth_router
 from roles.routers import roles_and_permissions_route
 from projects.routers import project_route
+from tasks.routers import task_route
+from comments.routers import comment_route
+from search.routers import search_route
+from outbox.services import deliver_pending_emails, OUTBOX_POLL_INTERVAL
+from tasks.services import mark_overdue_tasks, DEADLINE_SWEEP_INTERVAL
+from projects.services import purge_deleted_projects, purge_progress, PROJECT_PURGE_INTERVAL, PROJECT_PURGE_JOB
+from users.services import purge_expired_sessions, SESSION_SWEEP_INTERVAL
+from utils.emails import close_mail_backend
+from utils.permissions import load_permission_table, require_service_access
+from roles.services import seed_roles
+from activity_logs.services import activity_writer
+from core.scheduler import scheduler, PeriodicJob
+from core.database import pool_stats, ping_database
+from core.lifecycle import lifecycle
+from core.metrics import METRICS_ENABLED, MetricsMiddleware, render_metrics, render_samples
+from fastapi.responses import PlainTextResponse
+from utils.responses import ORJSONResponse
 import uvicorn
 
 
 
 
-app = FastAPI()
+scheduler.add(PeriodicJob("email-outbox", deliver_pending_emails, OUTBOX_POLL_INTERVAL, on_stop=close_mail_backend))
+scheduler.add(PeriodicJob("deadline-sweeper", mark_overdue_tasks, DEADLINE_SWEEP_INTERVAL, leader=True))
+scheduler.add(PeriodicJob(PROJECT_PURGE_JOB, purge_deleted_projects, PROJECT_PURGE_INTERVAL, leader=True))
+scheduler.add(PeriodicJob("session-sweeper", purge_expired_sessions, SESSION_SWEEP_INTERVAL, leader=True))
+
+
+# Прогрев до готовности: роли и права в памяти, по соединению в каждом пуле.
+# Остановка в обратном порядке: сначала фоновые задачи, затем дописывается журнал
+lifecycle.on_startup(seed_roles)
+lifecycle.on_startup(load_permission_table)
+lifecycle.on_startup(ping_database)
+lifecycle.on_startup(activity_writer.start)
+lifecycle.on_shutdown(activity_writer.stop)
+lifecycle.on_startup(scheduler.start)
+lifecycle.on_shutdown(scheduler.stop)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await lifecycle.startup()
+    yield
+    await lifecycle.shutdown()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
 app.include_router(auth_router, tags=["Authentication endpoints"])
 app.include_router(roles_and_permissions_route, tags=["Role and Permission endpoints"])
 app.include_router(project_route, tags=["project endpoints"])
+app.include_router(task_route, tags=["task endpoints"])
+app.include_router(comment_route, tags=["comment endpoints"])
+app.include_router(search_route, tags=["search endpoints"])
+
+
+@app.get("/health/live", tags=["service endpoints"])
+def liveness():
+    return {"status": "alive"}
+
+
+@app.get("/health/ready", tags=["service endpoints"])
+async def readiness():
+    if not lifecycle.ready:
+        return ORJSONResponse({"status": lifecycle.state()}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+    try:
+        await ping_database()
+    except Exception:
+        return ORJSONResponse({"status": "database unavailable"}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return {"status": "ready"}
+
+
+@app.get("/db/pool", tags=["service endpoints"], dependencies=[Depends(require_service_access)])
+def database_pool_stats():
+    return pool_stats()
+
+
+@app.get("/activity-log/stats", tags=["service endpoints"], dependencies=[Depends(require_service_access)])
+def activity_log_stats():
+    return activity_writer.stats()
+
+
+@app.get("/scheduler/stats", tags=["service endpoints"], dependencies=[Depends(require_service_access)])
+def scheduler_stats():
+    return scheduler.stats()
+
+
+@app.get("/project-purge/stats", tags=["service endpoints"], dependencies=[Depends(require_service_access)])
+def project_purge_stats():
+    return purge_progress.stats()
+
 
+@app.get(
+    "/metrics", tags=["service endpoints"], response_class=PlainTextResponse,
+    dependencies=[Depends(require_service_access)]
+)
+def metrics():
+    pools = pool_stats()
+    jobs = scheduler.stats()
+    writer = activity_writer.stats()
+    return render_metrics(
+        *(
+            render_samples(f"db_pool_{key}", f"Connection pool {key}.", "gauge", "engine",
+                           {name: stats[key] for name, stats in pools.items() if key in stats})
+            for key in ("checked_out", "checked_in", "overflow")
+        ),
+        *(
+            render_samples(f"scheduler_job_{key}_total", f"Periodic job {key}.", "counter", "job",
+                           {name: stats[key] for name, stats in jobs.items()})
+            for key in ("runs", "skipped", "failures")
+        ),
+        *(
+            render_samples(f"scheduler_job_{key}", documentation, "gauge", "job",
+                           {name: stats[stat] for name, stats in jobs.items() if stats[stat] is not None})
+            for key, stat, documentation in (
+                ("last_duration_seconds", "last_duration", "Duration of the last run of the periodic job."),
+                ("last_run_timestamp_seconds", "last_run_at", "Unix time the last run of the periodic job finished."),
+                ("last_success_timestamp_seconds", "last_success_at", "Unix time of the last successful run of the periodic job."),
+            )
+        ),
+        render_samples("activity_log_queue_depth", "Activity log entries waiting to be written.", "gauge",
+                       "writer", {"default": writer["queue_depth"]}),
+        render_samples("project_purge_rows_total", "Rows removed by the project purge.", "counter",
+                       "purge", {"default": purge_progress.stats()["purged_rows"]}),
+        render_samples("activity_log_dropped_total", "Activity log entries dropped on a full queue.", "counter",
+                       "writer", {"default": writer["dropped"]}),
+    )
 
 
 if __name__ == "__main__":
+    # Только для разработки; в продакшене: python -m core.server
     uvicorn.run("main:app", host="localhost", port=8000, reload=True)
\ No newline at end of file
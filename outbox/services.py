@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+import smtplib
+import uuid
+from decouple import config
+from sqlalchemy import select, update, insert
+from core.database import SessionLocal
+from utils.emails import get_mail_backend, build_message
+from .models import OutboxEmail, OutboxStatus
+
+
+OUTBOX_POLL_INTERVAL = config("OUTBOX_POLL_INTERVAL", default=5, cast=int)
+OUTBOX_BATCH_SIZE = config("OUTBOX_BATCH_SIZE", default=50, cast=int)
+OUTBOX_MAX_ATTEMPTS = config("OUTBOX_MAX_ATTEMPTS", default=5, cast=int)
+OUTBOX_RETRY_BASE_SECONDS = config("OUTBOX_RETRY_BASE_SECONDS", default=30, cast=int)
+# Сколько секунд захваченная пачка принадлежит воркеру, прежде чем ее заберет другой
+OUTBOX_LEASE_SECONDS = config("OUTBOX_LEASE_SECONDS", default=300, cast=int)
+
+# Ошибки конкретного письма; все остальные считаются проблемой соединения,
+# и остаток пачки откладывается, а не перебирается впустую
+MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+
+
+def enqueue_email(db, to_email: str, subject: str, body: str):
+    """Adds a message to the outbox; it is sent once the caller's transaction commits."""
+    email = OutboxEmail(to_email=to_email, subject=subject, body=body)
+    db.add(email)
+    return email
+
+
+def enqueue_emails_statement(messages):
+    """Builds one multi-row INSERT for a batch of messages; execute it in the caller's transaction."""
+    now = datetime.utcnow()
+    return insert(OutboxEmail).values([
+        {**message, "status": OutboxStatus.pending, "attempts": 0, "next_attempt_at": now, "created_at": now}
+        for message in messages
+    ])
+
+
+def _claim_batch(db):
+    now = datetime.utcnow()
+    token = uuid.uuid4().hex
+    due_ids = (
+        select(OutboxEmail.id)
+        .where(OutboxEmail.status == OutboxStatus.pending, OutboxEmail.next_attempt_at <= now)
+        .order_by(OutboxEmail.next_attempt_at)
+        .limit(OUTBOX_BATCH_SIZE)
+    )
+    db.execute(
+        update(OutboxEmail)
+        .where(
+            OutboxEmail.id.in_(due_ids.scalar_subquery()),
+            OutboxEmail.status == OutboxStatus.pending,
+            OutboxEmail.next_attempt_at <= now
+        )
+        .values(lease_token=token, next_attempt_at=now + timedelta(seconds=OUTBOX_LEASE_SECONDS))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return db.execute(select(OutboxEmail).where(OutboxEmail.lease_token == token)).scalars().all()
+
+
+def _record_failure(email: OutboxEmail, error: Exception):
+    email.last_error = str(error)
+    if email.attempts >= OUTBOX_MAX_ATTEMPTS:
+        email.status = OutboxStatus.failed
+    else:
+        backoff = OUTBOX_RETRY_BASE_SECONDS * 2 ** (email.attempts - 1)
+        email.next_attempt_at = datetime.utcnow() + timedelta(seconds=backoff)
+
+
+def deliver_pending_emails():
+    """Sends due outbox messages in batches over one reused mail backend connection."""
+    sent = 0
+    backend = get_mail_backend()
+    db = SessionLocal()
+    try:
+        while True:
+            batch = _claim_batch(db)
+            connection_error = None
+            for email in batch:
+                email.lease_token = None
+                if connection_error is not None:
+                    email.next_attempt_at = datetime.utcnow() + timedelta(seconds=OUTBOX_RETRY_BASE_SECONDS)
+                    continue
+                email.attempts += 1
+                try:
+                    backend.send(build_message(email.to_email, email.subject, email.body))
+                except MESSAGE_ERRORS as e:
+                    _record_failure(email, e)
+                    continue
+                except Exception as e:
+                    backend.close()
+                    _record_failure(email, e)
+                    connection_error = e
+                    continue
+                email.status = OutboxStatus.sent
+                email.sent_at = datetime.utcnow()
+                email.last_error = None
+                sent += 1
+            db.commit()
+            if connection_error is not None or len(batch) < OUTBOX_BATCH_SIZE:
+                return sent
+    finally:
+        db.close()
@@ -0,0 +1,187 @@
+"""Denormalized counters: tasks per status and members per project, comments per task.
+
+ORM writes keep them up to date incrementally (``count_on_flush``); Core bulk
+writes that bypass the session apply their deltas with ``apply_counter_deltas``.
+If the counters ever drift, rebuild them from the source tables:
+
+    python -m projects.counters [--project ID ...]
+"""
+import argparse
+from collections import Counter, defaultdict
+from sqlalchemy import select, delete, insert, func, cast, literal, event, inspect, String
+from sqlalchemy.orm import Session
+from core.database import upsert_increment
+from .models import Project, ProjectCounter, ProjectUserRole, MembershipStatus
+from tasks.models import Task, TaskCounter, TaskStatus
+from comments.models import Comment
+
+
+MEMBERS = "members"
+COMMENTS = "comments"
+TASKS_PREFIX = "tasks:"
+
+OWNER_COLUMNS = {ProjectCounter: "project_id", TaskCounter: "task_id"}
+
+
+def status_counter(status):
+    return TASKS_PREFIX + TaskStatus(status).value
+
+
+def _task_counter(project_id, status, is_deleted):
+    if not is_deleted and status is not None:
+        return ProjectCounter, project_id, status_counter(status)
+
+
+def _comment_counter(task_id, is_deleted):
+    if not is_deleted:
+        return TaskCounter, task_id, COMMENTS
+
+
+def _membership_counter(project_id, status):
+    if status == MembershipStatus.accepted:
+        return ProjectCounter, project_id, MEMBERS
+
+
+# Модель -> (атрибуты, от которых зависит счетчик; счетчик, в который попадает строка)
+TRACKED = {
+    Task: (("project_id", "status", "is_deleted"), _task_counter),
+    Comment: (("task_id", "is_deleted"), _comment_counter),
+    ProjectUserRole: (("project_id", "status"), _membership_counter),
+}
+
+
+def _keep_old_value(target, value, oldvalue, initiator):
+    pass
+
+
+# Присваивание атрибуту истекшего после commit объекта иначе не загружает
+# старое значение, и декремент уходит в пустоту
+for model, (keys, _) in TRACKED.items():
+    for key in keys:
+        event.listen(getattr(model, key), "set", _keep_old_value, active_history=True)
+
+
+def _old_values(obj, keys):
+    attrs = inspect(obj).attrs
+    values = []
+    for key in keys:
+        history = attrs[key].load_history()
+        values.append((history.deleted or history.unchanged or [None])[0])
+    return values
+
+
+def _new_values(obj, keys):
+    return [getattr(obj, key) for key in keys]
+
+
+def moved_tasks(project_ids, old_status, new_status):
+    """Deltas for tasks of ``project_ids`` (one entry per task) changing status."""
+    deltas = Counter()
+    for project_id in project_ids:
+        deltas[ProjectCounter, project_id, status_counter(old_status)] -= 1
+        deltas[ProjectCounter, project_id, status_counter(new_status)] += 1
+    return deltas
+
+
+def apply_counter_deltas(connection, deltas, dropped=()):
+    rows = defaultdict(list)
+    for (model, owner_id, name), delta in deltas.items():
+        if delta and (model, owner_id) not in dropped:
+            rows[model].append({OWNER_COLUMNS[model]: owner_id, "name": name, "value": delta})
+    for model, model_rows in rows.items():
+        upsert_increment(connection, model.__table__, model_rows, [OWNER_COLUMNS[model], "name"])
+
+
+@event.listens_for(Session, "after_flush")
+def count_on_flush(session, flush_context):
+    deltas = Counter()
+    for obj in session.new:
+        tracked = TRACKED.get(type(obj))
+        if tracked:
+            deltas[tracked[1](*_new_values(obj, tracked[0]))] += 1
+    for obj in session.dirty:
+        tracked = TRACKED.get(type(obj))
+        if tracked:
+            deltas[tracked[1](*_old_values(obj, tracked[0]))] -= 1
+            deltas[tracked[1](*_new_values(obj, tracked[0]))] += 1
+
+    # Счетчики удаленных проектов и задач уходят вместе с ними (ON DELETE CASCADE)
+    dropped = set()
+    for obj in session.deleted:
+        tracked = TRACKED.get(type(obj))
+        if tracked:
+            deltas[tracked[1](*_old_values(obj, tracked[0]))] -= 1
+        if isinstance(obj, Project):
+            dropped.add((ProjectCounter, obj.id))
+        elif isinstance(obj, Task):
+            dropped.add((TaskCounter, obj.id))
+
+    deltas.pop(None, None)
+    if any(deltas.values()):
+        apply_counter_deltas(session.connection(), deltas, dropped)
+
+
+def project_summary(project_id: int, counters: dict):
+    tasks = {status.value: counters.get(status_counter(status), 0) for status in TaskStatus}
+    return {
+        "project_id": project_id,
+        "members": counters.get(MEMBERS, 0),
+        "tasks": tasks,
+        "tasks_total": sum(tasks.values()),
+    }
+
+
+def recompute_counters(db, project_ids=None):
+    """Rebuilds the counters of ``project_ids`` (all projects if None) with GROUP BY."""
+    task_filter = Task.project_id.in_(project_ids) if project_ids is not None else True
+    project_filter = ProjectCounter.project_id.in_(project_ids) if project_ids is not None else True
+    task_ids = select(Task.id).where(task_filter)
+
+    db.execute(delete(ProjectCounter).where(project_filter))
+    db.execute(delete(TaskCounter).where(TaskCounter.task_id.in_(task_ids)))
+
+    db.execute(insert(ProjectCounter).from_select(
+        ["project_id", "name", "value"],
+        select(Task.project_id, literal(TASKS_PREFIX) + cast(Task.status, String), func.count())
+        # Задача без статуса не попадает ни в один счетчик, как и в count_on_flush
+        .where(task_filter, Task.is_deleted == False, Task.status.isnot(None))
+        .group_by(Task.project_id, Task.status)
+    ))
+    db.execute(insert(ProjectCounter).from_select(
+        ["project_id", "name", "value"],
+        select(ProjectUserRole.project_id, literal(MEMBERS), func.count())
+        .where(
+            ProjectUserRole.project_id.in_(project_ids) if project_ids is not None else True,
+            ProjectUserRole.status == MembershipStatus.accepted
+        )
+        .group_by(ProjectUserRole.project_id)
+    ))
+    db.execute(insert(TaskCounter).from_select(
+        ["task_id", "name", "value"],
+        select(Comment.task_id, literal(COMMENTS), func.count())
+        .where(Comment.task_id.in_(task_ids), Comment.is_deleted == False)
+        .group_by(Comment.task_id)
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute project and task counters from the source tables.")
+    parser.add_argument("--project", type=int, action="append", help="only this project (repeatable)")
+    args = parser.parse_args()
+
+    # Остальные модели нужны только для настройки relationship-ов
+    import users.models, roles.models, activity_logs.models  # noqa: F401
+    from core.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        recompute_counters(db, args.project)
+        db.commit()
+        rows = db.scalar(select(func.count()).select_from(ProjectCounter))
+        print(f"counters recomputed, {rows} project counters in total")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
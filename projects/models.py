@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Table, Enum, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, Table, Enum, DateTime, Index, Boolean, false
 from sqlalchemy.orm import relationship
 from core.database import Base
 import enum
@@ -27,10 +27,15 @@ class Project(Base):
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
     owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    # Растет при каждом изменении задач, комментариев и участников проекта (projects.services)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    # Удаленный проект сразу недоступен, а его строки дочищает фоновый purge (projects.services)
+    is_deleted = Column(Boolean, nullable=False, default=False, server_default=false())
 
     owner = relationship("User", back_populates="owned_projects")
-    user_roles = relationship("ProjectUserRole", back_populates="project", cascade="all, delete-orphan")
-    tasks = relationship("Task", back_populates="project")
+    # passive_deletes: дочерние строки удаляет ON DELETE CASCADE в базе, ORM их не загружает
+    user_roles = relationship("ProjectUserRole", back_populates="project", cascade="all, delete-orphan", passive_deletes=True)
+    tasks = relationship("Task", back_populates="project", cascade="all, delete-orphan", passive_deletes=True)
 
 
 class MembershipStatus(str, enum.Enum):
@@ -50,4 +55,17 @@ class ProjectUserRole(Base):
 
     user = relationship("User", back_populates="project_roles")
     project = relationship("Project", back_populates="user_roles")
-    role = relationship("Role")
\ No newline at end of file
+    role = relationship("Role")
+
+    __table_args__ = (
+        Index("ix_project_user_roles_project_id_status", "project_id", "status"),
+    )
+
+
+class ProjectCounter(Base):
+    """Denormalized project totals: "tasks:<status>" and "members" (projects.counters)."""
+    __tablename__ = "project_counters"
+
+    project_id = Column(ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    name = Column(String, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
@@ -1,195 +1,273 @@
-from fastapi import APIRouter, Depends, status, HTTPException, BackgroundTasks
-from sqlalchemy.orm import Session
-from .schemas import ProjectCreateSchema, InviteMemberSchema, AcceptInviteSchema, AssignRoleSchema
-from core.database import get_db
-from utils.helpers import JWTBearer, get_current_user, generate_token
-from utils.emails import send_invite_email
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, status, HTTPException, Header, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from .schemas import ProjectCreateSchema, InviteMemberSchema, BulkInviteSchema, AcceptInviteSchema, AssignRoleSchema, ProjectDetailsSchema, ProjectCountersSchema
+from core.database import get_async_db, insert_ignore
+from utils.helpers import JWTBearer, get_current_user, get_token_version, generate_invite_token, decode_invite_token
+from utils.emails import build_invite_email
+from outbox.services import enqueue_email, enqueue_emails_statement
 from .models import Project
 from users.models import User
-from roles.models import Role
+from roles.services import role_registry
 from tasks.models import Task
 from comments.models import Comment
-from .models import ProjectUserRole, MembershipStatus
+from .models import ProjectUserRole, MembershipStatus, ProjectCounter
+from .services import (
+    render_project_details, bump_project_versions, project_etag,
+    mark_project_deleted, PROJECT_PURGE_JOB
+)
+from .counters import project_summary
+from activity_logs.services import log_activity
+from core.scheduler import scheduler
+from utils.permissions import require_permission, ensure_permission, invalidate_access, clear_access_cache
 
 
 project_route = APIRouter()
 
 
+async def get_live_project(db: AsyncSession, project_id: int):
+    # Проверка прав могла пройти по кэшу воркера, который еще не знает об удалении проекта
+    project = await db.get(Project, project_id)
+    if project is None or project.is_deleted:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+    return project
+
+
 
 @project_route.post("/create-project", status_code=status.HTTP_201_CREATED)
-def create_project(data: ProjectCreateSchema, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def create_project(data: ProjectCreateSchema, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_current_user)):
     project = Project(name=data.name, owner_id=current_user.id)
     db.add(project)
-    db.flush()
+    await db.flush()
 
-    owner_role = db.query(Role).filter_by(name="owner").first()
+    owner_role_id = await role_registry.id_for(db, "owner")
+    if owner_role_id is None:
+        raise HTTPException(status_code=500, detail="Role 'owner' not found")
     db.add(ProjectUserRole(
         user_id=current_user.id,
         project_id=project.id,
-        role_id=owner_role.id,
+        role_id=owner_role_id,
         status=MembershipStatus.accepted
     ))
 
-    db.commit()
-    db.refresh(project)
+    await db.commit()
     return {"message": f"Project '{project.name}' created", "project_id": project.id}
 
 
 @project_route.post("/projects/{project_id}/invite")
-def invite_user(
+async def invite_user(
     project_id: int,
     data: InviteMemberSchema,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+    _ = Depends(require_permission("add_members", fresh=True))
 ):
-    project = db.query(Project).filter_by(id=project_id).first()
-    if not project or project.owner_id != current_user.id:
-        raise HTTPException(status_code=403)
+    project = await get_live_project(db, project_id)
 
-    user = db.query(User).filter_by(email=data.email).first()
+    user = (await db.execute(select(User).filter_by(email=data.email))).scalar_one_or_none()
     if not user:
         raise HTTPException(status_code=404)
 
-    existing = db.query(ProjectUserRole).filter_by(user_id=user.id, project_id=project_id).first()
+    existing = await db.get(ProjectUserRole, (user.id, project_id))
     if existing:
         raise HTTPException(status_code=400, detail="User already invited or joined")
 
-    member_role = db.query(Role).filter_by(name="member").first()
-    if not member_role:
+    member_role_id = await role_registry.id_for(db, "member")
+    if member_role_id is None:
         raise HTTPException(status_code=500, detail="Role 'member' not found")
 
     db.add(ProjectUserRole(
         user_id=user.id,
         project_id=project_id,
-        role_id=member_role.id,
+        role_id=member_role_id,
         status=MembershipStatus.invited
     ))
 
-    invite_token = generate_token(user.id)
-    background_tasks.add_task(send_invite_email, user.email, project.name, invite_token)
+    invite_token = generate_invite_token(user.id, user.token_version, project_id)
+    enqueue_email(db, **build_invite_email(user.email, project.name, invite_token))
 
-    db.commit()
+    await db.commit()
+    invalidate_access(user.id, project_id)
     return {"message": f"Invitation sent to {user.email}"}
 
 
+@project_route.post("/projects/{project_id}/invite/bulk")
+async def bulk_invite_users(
+    project_id: int,
+    data: BulkInviteSchema,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+    _ = Depends(require_permission("add_members", fresh=True))
+):
+    project = await get_live_project(db, project_id)
+
+    member_role_id = await role_registry.id_for(db, "member")
+    if member_role_id is None:
+        raise HTTPException(status_code=500, detail="Role 'member' not found")
+
+    emails = list(dict.fromkeys(data.emails))
+    rows = (await db.execute(select(User.email, User.id, User.token_version).where(User.email.in_(emails)))).all()
+    users = {email: user_id for email, user_id, _ in rows}
+    token_versions = {user_id: token_version for _, user_id, token_version in rows}
+
+    # ON CONFLICT DO NOTHING: параллельное приглашение тех же людей не падает на PK,
+    # а приглашенными считаются только строки, которые вставил именно этот запрос
+    joined_at = datetime.utcnow()
+    inserted = set()
+    if users:
+        inserted = set((await insert_ignore(db, ProjectUserRole.__table__, [
+            {
+                "user_id": user_id,
+                "project_id": project_id,
+                "role_id": member_role_id,
+                "status": MembershipStatus.invited,
+                "joined_at": joined_at
+            }
+            for user_id in users.values()
+        ], ["user_id", "project_id"], returning=[ProjectUserRole.user_id])).scalars())
+
+    results = []
+    invited = []
+    for email in emails:
+        user_id = users.get(email)
+        if user_id is None:
+            results.append({"email": email, "status": "not_found"})
+        elif user_id not in inserted:
+            results.append({"email": email, "status": "already_member"})
+        else:
+            results.append({"email": email, "status": "invited"})
+            invited.append((email, user_id))
+
+    if invited:
+        await db.execute(bump_project_versions([project_id]))
+        await db.execute(enqueue_emails_statement([
+            build_invite_email(email, project.name, generate_invite_token(user_id, token_versions[user_id], project_id))
+            for email, user_id in invited
+        ]))
+    await db.commit()
+    # Мультистрочный INSERT идет мимо ORM-событий, поэтому журналируем явно
+    for _, user_id in invited:
+        invalidate_access(user_id, project_id)
+        log_activity(current_user.id, "project_user_role", project_id, "create", {
+            "user_id": user_id, "project_id": project_id, "role_id": member_role_id,
+            "status": MembershipStatus.invited.value
+        })
+
+    return {"invited": len(invited), "results": results}
+
+
 
 
 @project_route.post("/projects/accept-invite", status_code=status.HTTP_200_OK)
-def accept_invite(data: AcceptInviteSchema, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    membership = db.query(ProjectUserRole).filter_by(user_id=current_user.id, project_id=data.project_id).first()
-    if not membership or membership.status != MembershipStatus.invited:
+async def accept_invite(data: AcceptInviteSchema, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_current_user)):
+    project_id = data.project_id
+    if data.token is not None:
+        # Токен из письма годится только приглашенному и только для своего проекта
+        invite = decode_invite_token(data.token)
+        if (
+            invite is None
+            or invite["user_id"] != current_user.id
+            or (project_id is not None and invite["project_id"] != project_id)
+            or invite["ver"] != await get_token_version(db, current_user.id)
+        ):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or expired invite token")
+        project_id = invite["project_id"]
+
+    membership = await db.get(
+        ProjectUserRole, (current_user.id, project_id), options=[joinedload(ProjectUserRole.project)]
+    )
+    if not membership or membership.status != MembershipStatus.invited or membership.project.is_deleted:
         raise HTTPException(status_code=404)
 
     membership.status = MembershipStatus.accepted
-    db.commit()
+    await db.commit()
+    invalidate_access(current_user.id, project_id)
     return {"message": f"You've joined project {membership.project.name}"}
 
 
 
 @project_route.post("/projects/assign-role")
-def assign_role(data: AssignRoleSchema, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    project = db.query(Project).filter_by(id=data.project_id).first()
-    if not project or project.owner_id != current_user.id:
-        raise HTTPException(status_code=403)
+async def assign_role(data: AssignRoleSchema, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_current_user)):
+    await ensure_permission(db, current_user.id, data.project_id, "update_members", fresh=True)
 
-    membership = db.query(ProjectUserRole).filter_by(user_id=data.user_id, project_id=data.project_id).first()
+    membership = await db.get(
+        ProjectUserRole, (data.user_id, data.project_id), options=[joinedload(ProjectUserRole.user)]
+    )
     if not membership:
         raise HTTPException(status_code=404)
 
-    role = db.query(Role).filter_by(id=data.role_id).first()
-    if not role:
+    role_name = await role_registry.name_for(db, data.role_id)
+    if role_name is None:
         raise HTTPException(status_code=404)
 
-    membership.role_id = role.id
-    db.commit()
-    return {"message": f"Role '{role.name}' assigned to user {membership.user.email}"}
+    membership.role_id = data.role_id
+    await db.commit()
+    invalidate_access(data.user_id, data.project_id)
+    return {"message": f"Role '{role_name}' assigned to user {membership.user.email}"}
 
 
 
 @project_route.delete("/projects/{project_id}/remove-user/{user_id}")
-def remove_user(project_id: int, user_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    project = db.query(Project).filter_by(id=project_id).first()
-    if not project or project.owner_id != current_user.id:
-        raise HTTPException(status_code=403)
-
-    membership = db.query(ProjectUserRole).filter_by(user_id=user_id, project_id=project_id).first()
+async def remove_user(
+    project_id: int,
+    user_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    _ = Depends(require_permission("delete_members", fresh=True))
+):
+    membership = await db.get(ProjectUserRole, (user_id, project_id))
     if not membership:
         raise HTTPException(status_code=404)
 
-    db.delete(membership)
-    db.commit()
+    await db.delete(membership)
+    await db.commit()
+    invalidate_access(user_id, project_id)
     return {"message": "User removed from project"}
 
 
-@project_route.get("/projects/{project_id}")
-def get_project_details(
+@project_route.get("/projects/{project_id}", response_model=ProjectDetailsSchema)
+async def get_project_details(
     project_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+    _ = Depends(require_permission("read_projects"))
 ):
-    project = db.query(Project).filter_by(id=project_id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
+    project = await get_live_project(db, project_id)
+    etag = project_etag(project.id, project.version)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match is not None and etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    body = await render_project_details(db, project)
+    return Response(content=body, media_type="application/json", headers=headers)
 
-    # Проверка доступа: участник или владелец
-    membership = db.query(ProjectUserRole).filter_by(
-        user_id=current_user.id,
-        project_id=project_id,
-        status=MembershipStatus.accepted
-    ).first()
-
-    if not membership and project.owner_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Access denied")
-
-    # Участники
-    members = (
-        db.query(User, Role.name.label("role"))
-        .join(ProjectUserRole, ProjectUserRole.user_id == User.id)
-        .join(Role, Role.id == ProjectUserRole.role_id)
-        .filter(ProjectUserRole.project_id == project_id, ProjectUserRole.status == MembershipStatus.accepted)
-        .all()
-    )
 
-    # Задачи и комментарии
-    tasks = db.query(Task).filter_by(project_id=project_id, is_deleted=False).all()
-    task_data = []
-    for task in tasks:
-        comments = db.query(Comment).filter_by(task_id=task.id, is_deleted=False).all()
-        task_data.append({
-            "id": task.id,
-            "title": task.title,
-            "status": task.status,
-            "comments": [{"id": c.id, "text": c.text, "author": c.author.username} for c in comments]
-        })
-
-    return {
-        "project": {
-            "id": project.id,
-            "name": project.name,
-            "owner": project.owner.username
-        },
-        "members": [
-            {"id": user.id, "username": user.username, "role": role}
-            for user, role in members
-        ],
-        "tasks": task_data
-    }
+@project_route.get("/projects/{project_id}/summary", response_model=ProjectCountersSchema)
+async def get_project_summary(
+    project_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    _ = Depends(require_permission("read_projects"))
+):
+    await get_live_project(db, project_id)
+    # Только денормализованные счетчики (projects.counters), без чтения задач и участников
+    counters = (await db.execute(
+        select(ProjectCounter.name, ProjectCounter.value).where(ProjectCounter.project_id == project_id)
+    )).all()
+    return project_summary(project_id, dict(counters))
 
 
 @project_route.delete("/projects/{project_id}")
-def delete_project(
+async def delete_project(
     project_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    _ = Depends(require_permission("delete_projects", fresh=True))
 ):
-    project = db.query(Project).filter_by(id=project_id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-
-    if project.owner_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Only the project owner can delete this project")
-
-    db.delete(project)
-    db.commit()
-    return {"message": f"Project '{project.name}' deleted"}
+    project = await get_live_project(db, project_id)
+    # Проект пропадает сразу, а строки всегда удаляет фоновый purge: даже у проекта
+    # с немногими задачами комментариев и журнала может быть сколько угодно
+    await db.execute(mark_project_deleted(project_id))
+    await db.commit()
+    clear_access_cache()
+    scheduler.trigger(PROJECT_PURGE_JOB)
+    return {"message": f"Project '{project.name}' deleted, its data will be removed in the background"}
@@ -1,6 +1,7 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field, model_validator
 from typing import Optional
 from datetime import datetime
+from tasks.models import TaskStatus
 
 class ProjectCreateSchema(BaseModel):
     name: str
@@ -8,11 +9,65 @@ class ProjectCreateSchema(BaseModel):
 class InviteMemberSchema(BaseModel):
     email:EmailStr
 
+class BulkInviteSchema(BaseModel):
+    emails: list[EmailStr] = Field(min_length=1, max_length=1000)
+
 class AcceptInviteSchema(BaseModel):
-    project_id: int
+    project_id: Optional[int] = None
+    # Токен из письма-приглашения (utils.helpers.generate_invite_token)
+    token: Optional[str] = None
+
+    @model_validator(mode="after")
+    def project_or_token(self):
+        if self.project_id is None and self.token is None:
+            raise ValueError("Either project_id or token is required")
+        return self
 
 
 class AssignRoleSchema(BaseModel):
     project_id: int
     user_id: int
-    role_id: int
\ No newline at end of file
+    role_id: int
+
+class ProjectSummarySchema(BaseModel):
+    id: int
+    name: str
+    owner: Optional[str] = None
+
+
+class ProjectMemberSchema(BaseModel):
+    id: int
+    username: str
+    role: str
+
+    class Config:
+        from_attributes = True
+
+
+class TaskCommentSchema(BaseModel):
+    id: int
+    text: str
+    author: str
+
+    class Config:
+        from_attributes = True
+
+
+class ProjectTaskSchema(BaseModel):
+    id: int
+    title: str
+    status: Optional[TaskStatus] = None
+    comments: list[TaskCommentSchema] = []
+
+
+class ProjectDetailsSchema(BaseModel):
+    project: ProjectSummarySchema
+    members: list[ProjectMemberSchema]
+    tasks: list[ProjectTaskSchema]
+
+
+class ProjectCountersSchema(BaseModel):
+    project_id: int
+    members: int
+    tasks: dict[TaskStatus, int]
+    tasks_total: int
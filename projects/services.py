@@ -0,0 +1,222 @@
+import logging
+import threading
+from collections import defaultdict
+from itertools import chain
+from decouple import config
+import orjson
+from sqlalchemy import select, update, delete, event, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from core.database import SessionLocal
+from utils.helpers import TTLCache
+from .models import Project, ProjectUserRole, MembershipStatus
+from users.models import User
+from roles.models import Role
+from tasks.models import Task
+from comments.models import Comment
+from activity_logs.models import ActivityLog
+
+
+logger = logging.getLogger(__name__)
+
+PROJECT_DETAILS_CACHE_SIZE = config("PROJECT_DETAILS_CACHE_SIZE", default=1000, cast=int)
+PROJECT_PURGE_INTERVAL = config("PROJECT_PURGE_INTERVAL", default=30, cast=int)
+PROJECT_PURGE_BATCH_SIZE = config("PROJECT_PURGE_BATCH_SIZE", default=1000, cast=int)
+PROJECT_PURGE_JOB = "project-purge"
+
+# Отрендеренный JSON деталей проекта по (project_id, version): новая версия
+# просто не находит старую запись, инвалидировать ничего не нужно
+_details_cache = TTLCache(PROJECT_DETAILS_CACHE_SIZE)
+
+
+def project_etag(project_id: int, version: int):
+    return f'"{project_id}-{version}"'
+
+
+def bump_project_versions(project_ids=(), task_ids=()):
+    return (
+        update(Project)
+        .where(or_(
+            Project.id.in_(project_ids),
+            Project.id.in_(select(Task.project_id).where(Task.id.in_(task_ids)))
+        ))
+        .values(version=Project.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def bump_versions_on_flush(session, flush_context):
+    project_ids = set()
+    task_ids = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, (Task, ProjectUserRole)):
+            project_ids.add(obj.project_id)
+        elif isinstance(obj, Comment):
+            task_ids.add(obj.task_id)
+    if project_ids or task_ids:
+        session.connection().execute(bump_project_versions(project_ids, task_ids))
+
+async def render_project_details(db: AsyncSession, project: Project):
+    # Версия прочитана до данных: если запись успела пройти между ними, в кэш
+    # попадет более свежее тело под старой версией, и следующий bump его вытеснит
+    key = (project.id, project.version)
+    body = _details_cache.get(key)
+    if body is None:
+        details = await load_project_details(db, project)
+        body = orjson.dumps(details)
+        _details_cache.set(key, body)
+    return body
+
+
+async def load_project_details(db: AsyncSession, project: Project):
+    owner = await db.scalar(select(User.username).where(User.id == project.owner_id))
+
+    # Участники
+    members = (await db.execute(
+        select(User.id, User.username, Role.name.label("role"))
+        .join(ProjectUserRole, ProjectUserRole.user_id == User.id)
+        .join(Role, Role.id == ProjectUserRole.role_id)
+        .where(ProjectUserRole.project_id == project.id, ProjectUserRole.status == MembershipStatus.accepted)
+    )).all()
+
+    # Задачи
+    tasks = (await db.execute(
+        select(Task.id, Task.title, Task.status)
+        .where(Task.project_id == project.id, Task.is_deleted == False)
+        .order_by(Task.id)
+    )).all()
+
+    # Комментарии всех задач проекта одним запросом, сгруппированные по task_id.
+    # Сортировка по Task.id ведет план от индекса задач проекта; с Comment.task_id
+    # SQLite выбирал проход по всему индексу комментариев ради порядка
+    comments = (await db.execute(
+        select(Comment.id, Comment.task_id, Comment.text, User.username)
+        .join(Task, Task.id == Comment.task_id)
+        .join(User, User.id == Comment.author_id)
+        .where(Task.project_id == project.id, Task.is_deleted == False, Comment.is_deleted == False)
+        .order_by(Task.id, Comment.id)
+    )).all()
+
+    return build_project_details(project, owner, members, tasks, comments)
+
+
+def build_project_details(project, owner, members, tasks, comments):
+    # Словари прямо из строк запроса: формат задает ProjectDetailsSchema, но строить
+    # десятки тысяч моделей ради одного dump дороже, чем отдать словари orjson
+    comments_by_task = defaultdict(list)
+    for comment_id, task_id, text, author in comments:
+        comments_by_task[task_id].append({"id": comment_id, "text": text, "author": author})
+
+    return {
+        "project": {
+            "id": project.id,
+            "name": project.name,
+            "owner": owner
+        },
+        "members": [
+            {"id": user_id, "username": username, "role": role}
+            for user_id, username, role in members
+        ],
+        "tasks": [
+            {
+                "id": task.id,
+                "title": task.title,
+                "status": task.status,
+                "comments": comments_by_task.get(task.id, [])
+            }
+            for task in tasks
+        ]
+    }
+
+
+class PurgeProgress:
+    """Rows removed so far from projects that are being purged."""
+
+    def __init__(self):
+        self.projects = {}
+        self.purged = 0
+        self.rows = 0
+        self._lock = threading.Lock()
+
+    def add(self, project_id: int, kind: str, count: int):
+        with self._lock:
+            removed = self.projects.setdefault(project_id, {})
+            removed[kind] = removed.get(kind, 0) + count
+            self.rows += count
+
+    def finish(self, project_id: int):
+        with self._lock:
+            self.projects.pop(project_id, None)
+            self.purged += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_progress": {project_id: dict(removed) for project_id, removed in self.projects.items()},
+                "purged_projects": self.purged,
+                "purged_rows": self.rows,
+            }
+
+
+purge_progress = PurgeProgress()
+
+
+def mark_project_deleted(project_id: int):
+    return update(Project).where(Project.id == project_id).values(is_deleted=True)
+
+
+def _chunk(model, ids):
+    return delete(model).where(model.id.in_(ids.limit(PROJECT_PURGE_BATCH_SIZE).scalar_subquery()))
+
+
+def purge_statements(project_id: int):
+    task_ids = select(Task.id).where(Task.project_id == project_id)
+    comment_ids = select(Comment.id).where(Comment.task_id.in_(task_ids))
+
+    def activity(entity_type, entity_ids):
+        return select(ActivityLog.id).where(ActivityLog.entity_type == entity_type, ActivityLog.entity_id.in_(entity_ids))
+
+    # Журнал ссылается на задачи и комментарии без FK, поэтому чистится до них
+    return (
+        ("activity_logs", _chunk(ActivityLog, activity("comment", comment_ids))),
+        ("activity_logs", _chunk(ActivityLog, activity("task", task_ids))),
+        ("activity_logs", _chunk(ActivityLog, activity("project_user_role", [project_id]))),
+        ("activity_logs", _chunk(ActivityLog, activity("project", [project_id]))),
+        ("comments", _chunk(Comment, comment_ids)),
+        ("tasks", _chunk(Task, task_ids)),
+    )
+
+
+def purge_project(db: Session, project_id: int):
+    """Deletes the rows of a project marked deleted, one bounded chunk per transaction.
+
+    The final DELETE of the project row cascades in the database to memberships
+    and counters; tasks go with their counters and search index rows.
+    """
+    for kind, statement in purge_statements(project_id):
+        while True:
+            removed = db.execute(statement).rowcount
+            db.commit()
+            if removed:
+                purge_progress.add(project_id, kind, removed)
+            if removed < PROJECT_PURGE_BATCH_SIZE:
+                break
+    db.execute(delete(Project).where(Project.id == project_id, Project.is_deleted == True))
+    db.commit()
+    purge_progress.finish(project_id)
+    logger.info("Project %s purged", project_id)
+
+
+def purge_deleted_projects():
+    """Purges every project marked deleted; returns the number of projects purged."""
+    db = SessionLocal()
+    try:
+        project_ids = db.execute(
+            select(Project.id).where(Project.is_deleted == True).order_by(Project.id)
+        ).scalars().all()
+        for project_id in project_ids:
+            purge_project(db, project_id)
+        return len(project_ids)
+    finally:
+        db.close()
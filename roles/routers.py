@@ -1,22 +1,32 @@
 from fastapi import APIRouter, Depends, status, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from .shcemas import RoleCreateSchema
-from core.database import get_db
+from core.database import get_async_db
 from .models import Permission, Role
-from utils.helpers import JWTBearer
+from utils.permissions import require_admin, reload_permission_table, bump_permissions_version
+from .services import role_registry, DEFAULT_ROLES
 
 roles_and_permissions_route = APIRouter()
 
-@roles_and_permissions_route.post("/create_role", dependencies=[Depends(JWTBearer())],status_code=status.HTTP_201_CREATED)
-async def create_role(data:RoleCreateSchema, db:Session = Depends(get_db)):
-    role = db.query(Role).filter(Role.name == data.name).first()
+@roles_and_permissions_route.post("/create_role", dependencies=[Depends(require_admin)], status_code=status.HTTP_201_CREATED)
+async def create_role(data:RoleCreateSchema, db:AsyncSession = Depends(get_async_db)):
+    # Встроенные роли общие для всех проектов, от их прав зависит само приложение
+    if data.name in DEFAULT_ROLES:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"Role '{data.name}' is built-in and can't be changed")
+    result = await db.execute(select(Role).options(selectinload(Role.permissions)).where(Role.name == data.name))
+    role = result.scalar_one_or_none()
     if not role:
-        role = Role(name = data.name)
-    permissions = db.query(Permission).filter(Permission.id.in_(data.permissions)).all()
-    role.permissions.extend(permissions)
+        role = Role(name = data.name, description = data.description, permissions = [])
+    permissions = (await db.execute(select(Permission).where(Permission.id.in_(data.permissions)))).scalars().all()
+    role.permissions.extend(permission for permission in permissions if permission not in role.permissions)
     db.add(role)
-    db.commit()
-    db.refresh(role)
+    # Остальные воркеры увидят новую версию и перечитают таблицу прав (utils.permissions.refresh_permission_table)
+    await db.execute(bump_permissions_version())
+    await db.commit()
+    await reload_permission_table(db)
+    await db.run_sync(role_registry.load)
     return {"message": "Role created"}
 
 
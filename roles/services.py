@@ -0,0 +1,86 @@
+import threading
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.database import SessionLocal, insert_ignore
+from core.models import CacheVersion
+from utils.permissions import add_permissions, PERMISSIONS_VERSION
+from .models import Role, Permission, role_permissions
+
+
+PERMISSION_MODELS = ["projects", "members", "tasks", "comments"]
+
+DEFAULT_ROLES = {
+    "owner": {
+        "description": "Project owner",
+        "permissions": [f"{action}_{model}" for model in PERMISSION_MODELS for action in ("add", "read", "update", "delete")],
+    },
+    "member": {
+        "description": "Project member",
+        "permissions": [
+            "read_projects", "read_members",
+            "add_tasks", "read_tasks", "update_tasks",
+            "add_comments", "read_comments", "update_comments",
+        ],
+    },
+}
+
+
+class RoleRegistry:
+    """In-memory role name <-> id map, loaded at startup and after role changes."""
+
+    def __init__(self):
+        self.ids = {}
+        self.names = {}
+        self._lock = threading.Lock()
+
+    def load(self, session: Session):
+        rows = session.execute(select(Role.id, Role.name)).all()
+        with self._lock:
+            self.ids = {name: role_id for role_id, name in rows}
+            self.names = {role_id: name for role_id, name in rows}
+
+    def seed(self, session: Session):
+        """Idempotently creates the permissions and default roles the app relies on."""
+        add_permissions(PERMISSION_MODELS, session)
+        insert_ignore(
+            session, Role.__table__,
+            [{"name": name, "description": role["description"]} for name, role in DEFAULT_ROLES.items()],
+            ["name"]
+        )
+        role_ids = dict(session.execute(select(Role.name, Role.id).where(Role.name.in_(DEFAULT_ROLES))).all())
+        permission_ids = dict(session.execute(select(Permission.name, Permission.id)).all())
+        insert_ignore(
+            session, role_permissions,
+            [
+                {"role_id": role_ids[name], "permission_id": permission_ids[permission]}
+                for name, role in DEFAULT_ROLES.items()
+                for permission in role["permissions"]
+            ],
+            ["role_id", "permission_id"]
+        )
+        insert_ignore(session, CacheVersion.__table__, [{"name": PERMISSIONS_VERSION, "version": 0}], ["name"])
+        session.commit()
+        self.load(session)
+
+    async def id_for(self, db: AsyncSession, name: str):
+        # Промах означает, что роль могли создать в другом воркере: перечитываем
+        if name not in self.ids:
+            await db.run_sync(self.load)
+        return self.ids.get(name)
+
+    async def name_for(self, db: AsyncSession, role_id: int):
+        if role_id not in self.names:
+            await db.run_sync(self.load)
+        return self.names.get(role_id)
+
+
+role_registry = RoleRegistry()
+
+
+def seed_roles():
+    db = SessionLocal()
+    try:
+        role_registry.seed(db)
+    finally:
+        db.close()
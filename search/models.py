@@ -0,0 +1,73 @@
+from sqlalchemy import DDL, event
+from tasks.models import Task
+from comments.models import Comment
+
+
+# Поисковый индекс не описывается моделями: в SQLite это FTS5-таблица,
+# которую триггеры держат в синхронизации с tasks и comments, в PostgreSQL -
+# GIN-индексы по выражениям tsvector. Миграция c2f8a6d95e14 создает то же самое.
+
+# rowid в search_index: задача id -> 2*id, комментарий id -> 2*id+1
+SQLITE_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE search_index USING fts5(
+        task_id UNINDEXED, title, body, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER tasks_search_insert AFTER INSERT ON tasks WHEN NEW.is_deleted = 0 BEGIN
+        INSERT INTO search_index(rowid, task_id, title, body)
+        VALUES (NEW.id * 2, NEW.id, NEW.title, coalesce(NEW.description, ''));
+    END
+    """,
+    """
+    CREATE TRIGGER tasks_search_update AFTER UPDATE OF title, description, is_deleted ON tasks BEGIN
+        DELETE FROM search_index WHERE rowid = OLD.id * 2;
+        INSERT INTO search_index(rowid, task_id, title, body)
+        SELECT NEW.id * 2, NEW.id, NEW.title, coalesce(NEW.description, '') WHERE NEW.is_deleted = 0;
+    END
+    """,
+    """
+    CREATE TRIGGER tasks_search_delete AFTER DELETE ON tasks BEGIN
+        DELETE FROM search_index WHERE rowid = OLD.id * 2;
+    END
+    """,
+    """
+    CREATE TRIGGER comments_search_insert AFTER INSERT ON comments WHEN NEW.is_deleted = 0 BEGIN
+        INSERT INTO search_index(rowid, task_id, title, body)
+        VALUES (NEW.id * 2 + 1, NEW.task_id, '', NEW.text);
+    END
+    """,
+    """
+    CREATE TRIGGER comments_search_update AFTER UPDATE OF text, is_deleted ON comments BEGIN
+        DELETE FROM search_index WHERE rowid = OLD.id * 2 + 1;
+        INSERT INTO search_index(rowid, task_id, title, body)
+        SELECT NEW.id * 2 + 1, NEW.task_id, '', NEW.text WHERE NEW.is_deleted = 0;
+    END
+    """,
+    """
+    CREATE TRIGGER comments_search_delete AFTER DELETE ON comments BEGIN
+        DELETE FROM search_index WHERE rowid = OLD.id * 2 + 1;
+    END
+    """,
+]
+
+# Выражения должны совпадать с теми, что строит search.services, иначе индекс не используется
+TASK_TSVECTOR = (
+    "setweight(to_tsvector('simple', title), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'B')"
+)
+COMMENT_TSVECTOR = "to_tsvector('simple', text)"
+
+POSTGRESQL_SEARCH_DDL = [
+    f"CREATE INDEX ix_tasks_search ON tasks USING gin (({TASK_TSVECTOR})) WHERE is_deleted = false",
+    f"CREATE INDEX ix_comments_search ON comments USING gin (({COMMENT_TSVECTOR})) WHERE is_deleted = false",
+]
+
+
+# Для create_all; comments создается после tasks, к этому моменту есть обе таблицы
+for statement in SQLITE_SEARCH_DDL:
+    event.listen(Comment.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+for statement in POSTGRESQL_SEARCH_DDL:
+    event.listen(Comment.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+event.listen(Comment.__table__, "before_drop", DDL("DROP TABLE IF EXISTS search_index").execute_if(dialect="sqlite"))
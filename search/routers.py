@@ -0,0 +1,26 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.database import get_async_db
+from utils.permissions import require_permission, permission_table
+from .services import search_project
+
+
+search_route = APIRouter()
+
+
+@search_route.get("/projects/{project_id}/search")
+async def search_in_project(
+    project_id: int,
+    q: str = Query(min_length=1, max_length=200),
+    cursor: Optional[int] = Query(None, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    access_mask: int = Depends(require_permission("read_tasks"))
+):
+    # Из одних пробелов получился бы пустой MATCH, на котором FTS5 падает
+    text = q.strip()
+    if not text:
+        return {"items": [], "next_cursor": None}
+    include_comments = permission_table.allows(access_mask, "read_comments")
+    return await search_project(db, project_id, text, include_comments, cursor, limit)
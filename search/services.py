@@ -0,0 +1,105 @@
+from sqlalchemy import Integer, select, func, literal, literal_column, union_all, table, column
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.database import IS_SQLITE
+from tasks.models import Task
+from comments.models import Comment
+from .models import TASK_TSVECTOR, COMMENT_TSVECTOR
+
+
+search_index = table("search_index", column("rowid", Integer), column("task_id", Integer), column("title"), column("body"))
+_fts = literal_column("search_index")
+# Конфигурация литералом: с параметром asyncpg передает varchar, а функциям нужен regconfig
+_ts_config = literal_column("'simple'")
+
+
+def fts_query(text: str):
+    # Каждое слово в кавычках: пользовательский ввод не должен разбираться как синтаксис FTS5
+    return " ".join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+
+def _sqlite_statement(project_id: int, text: str, include_comments: bool):
+    is_comment = search_index.c.rowid % 2
+    statement = (
+        select(
+            func.iif(is_comment == 1, "comment", "task").label("type"),
+            (search_index.c.rowid // 2).label("id"),
+            search_index.c.task_id,
+            Task.title.label("task_title"),
+            func.snippet(_fts, -1, "<b>", "</b>", "…", 12).label("snippet"),
+            # bm25 тем лучше, чем меньше; заголовок весит больше текста
+            func.bm25(_fts, 0.0, 4.0, 1.0).label("rank")
+        )
+        .join(Task, Task.id == search_index.c.task_id)
+        .where(_fts.op("MATCH")(fts_query(text)), Task.project_id == project_id, Task.is_deleted == False)
+        .order_by(literal_column("rank"))
+    )
+    if not include_comments:
+        statement = statement.where(is_comment == 0)
+    return statement
+
+
+def _postgresql_statement(project_id: int, text: str, include_comments: bool):
+    query = func.websearch_to_tsquery(_ts_config, text)
+    task_vector = literal_column(f"({TASK_TSVECTOR})")
+    tasks = (
+        select(
+            literal("task").label("type"),
+            Task.id.label("id"),
+            Task.id.label("task_id"),
+            Task.title.label("task_title"),
+            func.ts_headline(_ts_config, Task.title + " " + func.coalesce(Task.description, ""), query).label("snippet"),
+            func.ts_rank(task_vector, query).label("rank")
+        )
+        .where(task_vector.op("@@")(query), Task.project_id == project_id, Task.is_deleted == False)
+    )
+    if not include_comments:
+        return tasks.order_by(literal_column("rank").desc())
+
+    comment_vector = literal_column(f"({COMMENT_TSVECTOR})")
+    comments = (
+        select(
+            literal("comment").label("type"),
+            Comment.id.label("id"),
+            Comment.task_id,
+            Task.title.label("task_title"),
+            func.ts_headline(_ts_config, Comment.text, query).label("snippet"),
+            func.ts_rank(comment_vector, query).label("rank")
+        )
+        .join(Task, Task.id == Comment.task_id)
+        .where(
+            comment_vector.op("@@")(query), Comment.is_deleted == False,
+            Task.project_id == project_id, Task.is_deleted == False
+        )
+    )
+    results = union_all(tasks, comments).subquery()
+    return select(results).order_by(results.c.rank.desc())
+
+
+def search_statement(project_id: int, text: str, include_comments: bool):
+    if IS_SQLITE:
+        return _sqlite_statement(project_id, text, include_comments)
+    return _postgresql_statement(project_id, text, include_comments)
+
+
+async def search_project(db: AsyncSession, project_id: int, text: str, include_comments: bool, cursor: int, limit: int):
+    # Результаты упорядочены по релевантности, поэтому курсор - это смещение
+    offset = cursor or 0
+    rows = (await db.execute(
+        search_statement(project_id, text, include_comments).offset(offset).limit(limit + 1)
+    )).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "items": [
+            {
+                "type": row.type,
+                "id": row.id,
+                "task_id": row.task_id,
+                "task_title": row.task_title,
+                "snippet": row.snippet,
+                "rank": row.rank
+            }
+            for row in rows
+        ],
+        "next_cursor": offset + limit if has_more else None
+    }
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey, Boolean, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from core.database import Base
@@ -38,4 +38,24 @@ class Task(Base):
     author = relationship("User", foreign_keys=[author_id], back_populates="tasks_authored")
     assignee = relationship("User", foreign_keys=[assignee_id], back_populates="tasks_assigned")
     project = relationship("Project", back_populates="tasks")
-    comments = relationship("Comment", back_populates="task", cascade="all, delete-orphan")
\ No newline at end of file
+    comments = relationship("Comment", back_populates="task", cascade="all, delete-orphan", passive_deletes=True)
+
+    __table_args__ = (
+        # Живые задачи проекта в порядке id: фильтр роутеров и keyset-пагинация
+        Index(
+            "ix_tasks_project_id_live", "project_id", "id",
+            sqlite_where=text("is_deleted = 0"), postgresql_where=text("is_deleted = false")
+        ),
+        Index("ix_tasks_assignee_id_deadline", "assignee_id", "deadline"),
+        # Поиск просроченных задач фоновым sweeper'ом (tasks.services)
+        Index("ix_tasks_deadline_status", "deadline", "status"),
+    )
+
+
+class TaskCounter(Base):
+    """Denormalized task totals: "comments" (projects.counters)."""
+    __tablename__ = "task_counters"
+
+    task_id = Column(ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    name = Column(String, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,54 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select, func, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.database import get_async_db
+from utils.pagination import paginate, ndjson_response
+from utils.permissions import require_permission
+from projects.counters import COMMENTS
+from .models import Task, TaskCounter
+from .shcemas import TaskPageSchema
+
+
+task_route = APIRouter()
+
+
+def serialize_task(row):
+    return {
+        "id": row.id,
+        "title": row.title,
+        "description": row.description,
+        "status": row.status,
+        "deadline": row.deadline,
+        "created_at": row.created_at,
+        "author_id": row.author_id,
+        "assignee_id": row.assignee_id,
+        "comment_count": row.comment_count
+    }
+
+
+def project_tasks_statement(project_id: int):
+    return (
+        select(
+            Task.id, Task.title, Task.description, Task.status, Task.deadline,
+            Task.created_at, Task.author_id, Task.assignee_id,
+            func.coalesce(TaskCounter.value, 0).label("comment_count")
+        )
+        .outerjoin(TaskCounter, and_(TaskCounter.task_id == Task.id, TaskCounter.name == COMMENTS))
+        .where(Task.project_id == project_id, Task.is_deleted == False)
+    )
+
+
+@task_route.get("/projects/{project_id}/tasks", response_model=TaskPageSchema)
+async def list_project_tasks(
+    project_id: int,
+    cursor: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=500),
+    stream: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    _ = Depends(require_permission("read_tasks"))
+):
+
+    if stream:
+        return ndjson_response(project_tasks_statement(project_id).order_by(Task.id), serialize_task)
+    return await paginate(db, project_tasks_statement(project_id), Task.id, cursor, limit, serialize_task)
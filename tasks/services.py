@@ -0,0 +1,49 @@
+from datetime import datetime
+from decouple import config
+from sqlalchemy import select, update
+from core.database import SessionLocal
+from projects.services import bump_project_versions
+from projects.counters import apply_counter_deltas, moved_tasks
+from .models import Task, TaskStatus
+
+
+DEADLINE_SWEEP_INTERVAL = config("DEADLINE_SWEEP_INTERVAL", default=60, cast=int)
+DEADLINE_SWEEP_BATCH_SIZE = config("DEADLINE_SWEEP_BATCH_SIZE", default=1000, cast=int)
+
+OPEN_STATUSES = (TaskStatus.new, TaskStatus.in_progress)
+
+
+def mark_overdue_tasks():
+    """Moves open tasks past their deadline to the overdue status, in batches."""
+    marked = 0
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        # По одному статусу за проход: RETURNING отдает уже новый статус, а счетчикам нужен старый
+        for open_status in OPEN_STATUSES:
+            while True:
+                overdue_ids = (
+                    select(Task.id)
+                    .where(Task.deadline < now, Task.status == open_status, Task.is_deleted == False)
+                    .limit(DEADLINE_SWEEP_BATCH_SIZE)
+                    .scalar_subquery()
+                )
+                project_ids = db.execute(
+                    update(Task)
+                    .where(Task.id.in_(overdue_ids))
+                    .values(status=TaskStatus.overdue)
+                    .returning(Task.project_id)
+                    .execution_options(synchronize_session=False)
+                ).scalars().all()
+                updated = len(project_ids)
+                # Пакетный UPDATE идет мимо ORM-событий, версии и счетчики проектов поднимаем сами
+                if project_ids:
+                    db.execute(bump_project_versions(set(project_ids)))
+                    apply_counter_deltas(db.connection(), moved_tasks(project_ids, open_status, TaskStatus.overdue))
+                db.commit()
+                marked += updated
+                if updated < DEADLINE_SWEEP_BATCH_SIZE:
+                    break
+        return marked
+    finally:
+        db.close()
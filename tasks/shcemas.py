@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+from .models import TaskStatus
+
+
+class TaskSchema(BaseModel):
+    id: int
+    title: str
+    description: Optional[str] = None
+    status: Optional[TaskStatus] = None
+    deadline: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    author_id: Optional[int] = None
+    assignee_id: Optional[int] = None
+    comment_count: int = 0
+
+    class Config:
+        from_attributes = True
+
+
+class TaskPageSchema(BaseModel):
+    items: list[TaskSchema]
+    next_cursor: Optional[int] = None
@@ -0,0 +1,94 @@
+import os
+import tempfile
+
+# Настройки читаются при импорте модулей приложения, поэтому окружение задается до них
+_tmp_dir = tempfile.mkdtemp(prefix="plane-tests-")
+os.environ.update(
+    SECRET="test-secret-key-for-the-test-suite-only",
+    ALGORITHM="HS256",
+    DATABASE_URL=f"sqlite:///{_tmp_dir}/test.db",
+    MAIL_BACKEND="memory",
+    BCRYPT_ROUNDS="4",
+    # Таблица прав сверяется с базой только там, где тест сам сдвигает checked_at
+    PERMISSION_TABLE_TTL="3600",
+)
+
+import itertools
+from contextlib import contextmanager
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+
+_usernames = itertools.count()
+
+
+@pytest.fixture(scope="session")
+def app():
+    import main
+    from core.database import Base, engine
+    from roles.services import seed_roles
+    from utils.permissions import load_permission_table
+
+    Base.metadata.create_all(engine)
+    seed_roles()
+    load_permission_table()
+    return main.app
+
+
+@pytest.fixture
+def client(app):
+    return TestClient(app)
+
+
+@pytest.fixture
+def db(app):
+    from core.database import SessionLocal
+
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def register(client):
+    """Registers a new user and returns (user_id, auth headers, tokens)."""
+    def register(username=None):
+        username = username or f"user{next(_usernames)}"
+        response = client.post("/register", json={
+            "username": username, "email": f"{username}@example.com",
+            "password_hash": "password", "confirm_password": "password"
+        })
+        assert response.status_code == 201, response.text
+        tokens = client.post("/login", json={"username": username, "password_hash": "password"}).json()
+        return response.json()["id"], {"Authorization": f"Bearer {tokens['access_token']}"}, tokens
+    return register
+
+
+@pytest.fixture
+def make_admin(db):
+    def make_admin(user_id):
+        from users.models import User
+        db.get(User, user_id).is_admin = True
+        db.commit()
+    return make_admin
+
+
+@pytest.fixture
+def count_statements(app):
+    """Context manager counting statements sent through the async engine."""
+    from core.database import async_engine
+
+    @contextmanager
+    def count_statements():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    return count_statements
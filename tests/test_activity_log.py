@@ -0,0 +1,108 @@
+import time
+from datetime import datetime
+import pytest
+from sqlalchemy import select, func
+from activity_logs.models import ActivityLog
+from activity_logs.services import ActivityLogWriter, activity_writer
+from tasks.models import Task
+
+
+def entry(user_id, entity_type, entity_id=1):
+    return {
+        "user_id": user_id, "entity_type": entity_type, "entity_id": entity_id,
+        "action": "create", "changes": None, "created_at": datetime.utcnow()
+    }
+
+
+def count_rows(db, entity_type):
+    return db.scalar(select(func.count()).select_from(ActivityLog).where(ActivityLog.entity_type == entity_type))
+
+
+def test_record_drops_entries_instead_of_blocking_on_a_full_queue(register):
+    user_id, _, _ = register()
+    writer = ActivityLogWriter(maxsize=2, batch_size=10, flush_interval=60)
+
+    started = time.perf_counter()
+    for index in range(5):
+        writer.record(entry(user_id, "full-queue", index))
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.05
+    stats = writer.stats()
+    assert (stats["enqueued"], stats["dropped"], stats["queue_depth"]) == (2, 3, 2)
+
+
+def test_writer_flushes_full_batches_and_the_rest_on_stop(db, register):
+    user_id, _, _ = register()
+    writer = ActivityLogWriter(maxsize=100, batch_size=3, flush_interval=60)
+    writer.start()
+    for index in range(7):
+        writer.record(entry(user_id, "batched", index))
+    writer.stop(timeout=5)
+
+    stats = writer.stats()
+    assert (stats["flushes"], stats["written"], stats["flush_failures"]) == (3, 7, 0)
+    assert count_rows(db, "batched") == 7
+
+
+def test_writer_flushes_a_partial_batch_after_the_interval(db, register):
+    user_id, _, _ = register()
+    writer = ActivityLogWriter(maxsize=100, batch_size=100, flush_interval=0.1)
+    writer.start()
+    try:
+        writer.record(entry(user_id, "interval"))
+        writer.record(entry(user_id, "interval"))
+        deadline = time.monotonic() + 5
+        while writer.stats()["written"] < 2 and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        writer.stop(timeout=5)
+
+    assert writer.stats()["written"] == 2
+    assert count_rows(db, "interval") == 2
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    entries = []
+    monkeypatch.setattr(activity_writer, "record", entries.append)
+    return entries
+
+
+def test_collect_activity_records_committed_changes(client, db, register, recorded):
+    user_id, headers, _ = register()
+    project_id = client.post("/create-project", json={"name": "Activity"}, headers=headers).json()["project_id"]
+    recorded.clear()
+    db.info["actor_id"] = user_id
+
+    task = Task(title="first", project_id=project_id)
+    db.add(task)
+    db.commit()
+    # Старое значение в истории только у загруженного атрибута (AsyncSession приложения не экспайрит после commit)
+    assert task.title == "first"
+    task.title = "renamed"
+    db.commit()
+    db.delete(task)
+    db.commit()
+
+    assert [(item["entity_type"], item["action"], item["user_id"]) for item in recorded] == [
+        ("task", "create", user_id), ("task", "update", user_id), ("task", "delete", user_id)
+    ]
+    assert recorded[0]["changes"]["title"] == "first"
+    assert recorded[1]["changes"] == {"title": ["first", "renamed"]}
+
+
+def test_collect_activity_skips_rollbacks_and_anonymous_sessions(client, db, register, recorded):
+    user_id, headers, _ = register()
+    project_id = client.post("/create-project", json={"name": "Rollback"}, headers=headers).json()["project_id"]
+    recorded.clear()
+
+    db.add(Task(title="anonymous", project_id=project_id))
+    db.commit()
+    db.info["actor_id"] = user_id
+    db.add(Task(title="rolled back", project_id=project_id))
+    db.flush()
+    db.rollback()
+    db.commit()
+
+    assert recorded == []
@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+from sqlalchemy import select, update
+from users.models import UserSession
+from users.services import purge_expired_sessions
+
+
+def login(client, username):
+    return client.post("/login", json={"username": username, "password_hash": "password"}).json()
+
+
+def bearer(tokens):
+    return {"Authorization": f"Bearer {tokens['access_token']}"}
+
+
+def refresh(client, tokens):
+    return client.post("/token/refresh", json={"refresh_token": tokens["refresh_token"]})
+
+
+def is_authorized(client, tokens):
+    return client.post("/create-project", json={"name": "Auth"}, headers=bearer(tokens)).status_code == 201
+
+
+def test_logout_ends_only_the_current_session(client, register):
+    _, _, laptop = register("authlaptop")
+    phone = login(client, "authlaptop")
+
+    assert client.post("/logout", headers=bearer(laptop)).status_code == 200
+
+    assert not is_authorized(client, laptop)
+    assert refresh(client, laptop).status_code == 403
+    assert is_authorized(client, phone)
+    assert refresh(client, phone).status_code == 200
+
+
+def test_logout_all_ends_every_session(client, register):
+    _, _, laptop = register("authall")
+    phone = login(client, "authall")
+
+    assert client.post("/logout-all", headers=bearer(phone)).status_code == 200
+
+    for tokens in (laptop, phone):
+        assert not is_authorized(client, tokens)
+        assert refresh(client, tokens).status_code == 403
+    assert is_authorized(client, login(client, "authall"))
+
+
+def test_refresh_rotates_the_refresh_token(client, register):
+    _, _, first = register()
+
+    response = refresh(client, first)
+    assert response.status_code == 200
+    second = response.json()
+    assert second["refresh_token"] != first["refresh_token"]
+    assert is_authorized(client, second)
+
+    third = refresh(client, second).json()
+    assert is_authorized(client, third)
+
+
+def test_reused_refresh_token_closes_the_session(client, register):
+    _, _, first = register()
+    second = refresh(client, first).json()
+
+    # Старый refresh-токен предъявлен повторно: сессия закрывается целиком
+    assert refresh(client, first).status_code == 403
+    assert refresh(client, second).status_code == 403
+    assert not is_authorized(client, second)
+
+
+def test_access_token_is_not_a_refresh_token(client, register):
+    _, _, tokens = register()
+
+    response = client.post("/token/refresh", json={"refresh_token": tokens["access_token"]})
+
+    assert response.status_code == 403
+
+
+def test_expired_sessions_are_purged(client, db, register):
+    user_id, _, tokens = register()
+    db.execute(update(UserSession).where(UserSession.user_id == user_id).values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+    db.commit()
+
+    assert purge_expired_sessions() >= 1
+    assert db.scalar(select(UserSession.id).where(UserSession.user_id == user_id)) is None
+    assert refresh(client, tokens).status_code == 403
@@ -0,0 +1,51 @@
+import time
+from utils import helpers
+from utils.helpers import TTLCache, decode_jwt, encode_token, _payload_cache, _user_cache
+
+
+def test_cache_evicts_the_least_recently_used_entry():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+
+def test_cache_entry_expires_after_ttl(monkeypatch):
+    now = time.time()
+    cache = TTLCache(maxsize=10, ttl=60)
+    monkeypatch.setattr(helpers.time, "time", lambda: now)
+    cache.set("key", "value")
+
+    monkeypatch.setattr(helpers.time, "time", lambda: now + 59)
+    assert cache.get("key") == "value"
+    monkeypatch.setattr(helpers.time, "time", lambda: now + 61)
+    assert cache.get("key") is None
+    assert len(cache) == 0
+
+
+def test_cached_payload_expires_with_the_token(monkeypatch):
+    token = encode_token(1, 0, "access", ttl=60)
+    payload = decode_jwt(token)
+    assert payload is not None
+    assert _payload_cache.get(token) == payload
+
+    monkeypatch.setattr(helpers.time, "time", lambda: payload["exp"] + 1)
+
+    assert decode_jwt(token) is None
+    assert _payload_cache.get(token) is None
+
+
+def test_user_update_invalidates_the_cached_user(client, register, make_admin):
+    user_id, headers, _ = register()
+    assert client.get("/scheduler/stats", headers=headers).status_code == 403
+    assert _user_cache.get(user_id) is not None
+
+    make_admin(user_id)
+
+    assert _user_cache.get(user_id) is None
+    assert client.get("/scheduler/stats", headers=headers).status_code == 200
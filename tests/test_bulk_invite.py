@@ -0,0 +1,43 @@
+from sqlalchemy import select
+from outbox.models import OutboxEmail
+from projects.models import ProjectUserRole, MembershipStatus
+from roles.services import role_registry
+
+
+def test_bulk_invite_reports_rows_actually_inserted(client, db, register):
+    _, headers, _ = register()
+    first_id, _, _ = register("bulkfirst")
+    register("bulksecond")
+    project_id = client.post("/create-project", json={"name": "Bulk"}, headers=headers).json()["project_id"]
+    # Параллельный запрос успел пригласить первого пользователя
+    db.add(ProjectUserRole(
+        user_id=first_id, project_id=project_id,
+        role_id=role_registry.ids["member"], status=MembershipStatus.invited
+    ))
+    db.commit()
+
+    response = client.post(f"/projects/{project_id}/invite/bulk", headers=headers, json={"emails": [
+        "bulkfirst@example.com", "bulksecond@example.com", "bulksecond@example.com", "nobody@example.com"
+    ]})
+
+    assert response.status_code == 200
+    assert response.json() == {"invited": 1, "results": [
+        {"email": "bulkfirst@example.com", "status": "already_member"},
+        {"email": "bulksecond@example.com", "status": "invited"},
+        {"email": "nobody@example.com", "status": "not_found"},
+    ]}
+    recipients = db.scalars(select(OutboxEmail.to_email).where(OutboxEmail.to_email.like("bulk%"))).all()
+    assert recipients == ["bulksecond@example.com"]
+
+
+def test_repeated_bulk_invite_does_not_fail(client, register):
+    _, headers, _ = register()
+    register("bulkagain")
+    project_id = client.post("/create-project", json={"name": "Again"}, headers=headers).json()["project_id"]
+    payload = {"emails": ["bulkagain@example.com"]}
+
+    assert client.post(f"/projects/{project_id}/invite/bulk", headers=headers, json=payload).json()["invited"] == 1
+    response = client.post(f"/projects/{project_id}/invite/bulk", headers=headers, json=payload)
+
+    assert response.status_code == 200
+    assert response.json() == {"invited": 0, "results": [{"email": "bulkagain@example.com", "status": "already_member"}]}
@@ -0,0 +1,113 @@
+from sqlalchemy import select
+from comments.models import Comment
+from projects.counters import recompute_counters
+from projects.models import ProjectCounter, ProjectUserRole, MembershipStatus
+from roles.models import Role
+from tasks.models import Task, TaskCounter, TaskStatus
+
+
+def create_projects(client, headers, count):
+    return [
+        client.post("/create-project", json={"name": f"Counters {index}"}, headers=headers).json()["project_id"]
+        for index in range(count)
+    ]
+
+
+def counters(db, project_ids):
+    # Нулевые строки инкрементальный путь оставляет, а пересчет не создает
+    project_rows = db.execute(
+        select(ProjectCounter.project_id, ProjectCounter.name, ProjectCounter.value)
+        .where(ProjectCounter.project_id.in_(project_ids))
+    ).all()
+    task_rows = db.execute(
+        select(TaskCounter.task_id, TaskCounter.name, TaskCounter.value)
+        .join(Task, Task.id == TaskCounter.task_id)
+        .where(Task.project_id.in_(project_ids))
+    ).all()
+    return {
+        "projects": {(owner, name): value for owner, name, value in project_rows if value},
+        "tasks": {(owner, name): value for owner, name, value in task_rows if value},
+    }
+
+
+def summary(client, headers, project_id):
+    return client.get(f"/projects/{project_id}/summary", headers=headers).json()
+
+
+def test_incremental_counters_follow_task_changes(client, db, register):
+    user_id, headers, _ = register()
+    first, second = create_projects(client, headers, 2)
+    tasks = [Task(title=f"task {index}", project_id=first, author_id=user_id) for index in range(3)]
+    db.add_all(tasks)
+    db.commit()
+    assert summary(client, headers, first)["tasks"]["new"] == 3
+    assert summary(client, headers, first)["members"] == 1
+
+    tasks[0].status = TaskStatus.in_progress
+    tasks[1].project_id = second
+    tasks[1].status = TaskStatus.done
+    tasks[2].is_deleted = True
+    db.commit()
+
+    first_summary, second_summary = summary(client, headers, first), summary(client, headers, second)
+    assert first_summary["tasks"] == {"new": 0, "in_progress": 1, "done": 0, "overdue": 0}
+    assert first_summary["tasks_total"] == 1
+    assert second_summary["tasks"]["done"] == 1
+
+
+def test_incremental_comment_counters(client, db, register):
+    user_id, headers, _ = register()
+    project_id, = create_projects(client, headers, 1)
+    task = Task(title="task", project_id=project_id, author_id=user_id)
+    db.add(task)
+    db.flush()
+    comments = [Comment(text="comment", task_id=task.id, author_id=user_id) for _ in range(3)]
+    db.add_all(comments)
+    db.commit()
+    comments[0].is_deleted = True
+    db.delete(comments[1])
+    db.commit()
+
+    assert counters(db, [project_id])["tasks"] == {(task.id, "comments"): 1}
+
+
+def test_recompute_matches_incremental_counters(client, db, register):
+    user_id, headers, _ = register()
+    project_ids = create_projects(client, headers, 2)
+    member_id, _, _ = register()
+    role_id = db.scalar(select(Role.id).limit(1))
+    db.add(ProjectUserRole(user_id=member_id, project_id=project_ids[0], role_id=role_id, status=MembershipStatus.accepted))
+    tasks = [
+        Task(title=f"task {index}", project_id=project_ids[index % 2], author_id=user_id, status=status)
+        for index, status in enumerate([TaskStatus.new, TaskStatus.done, TaskStatus.in_progress, TaskStatus.new, TaskStatus.overdue])
+    ]
+    db.add_all(tasks)
+    db.flush()
+    db.add_all([Comment(text="comment", task_id=task.id, author_id=user_id) for task in tasks for _ in range(2)])
+    db.commit()
+    tasks[0].project_id = project_ids[1]
+    tasks[3].is_deleted = True
+    db.commit()
+    incremental = counters(db, project_ids)
+
+    recompute_counters(db, project_ids)
+    db.commit()
+
+    assert incremental["projects"][project_ids[0], "members"] == 2
+    assert counters(db, project_ids) == incremental
+
+
+def test_recompute_skips_tasks_without_status(client, db, register):
+    user_id, headers, _ = register()
+    project_id, = create_projects(client, headers, 1)
+    db.add_all([
+        Task(title="with status", project_id=project_id, author_id=user_id),
+        Task(title="no status", project_id=project_id, author_id=user_id, status=None),
+    ])
+    db.commit()
+
+    recompute_counters(db, [project_id])
+    db.commit()
+
+    names = set(db.scalars(select(ProjectCounter.name).where(ProjectCounter.project_id == project_id)))
+    assert names == {"members", "tasks:new"}
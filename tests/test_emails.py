@@ -0,0 +1,89 @@
+import socket
+import pytest
+from utils.emails import SMTPBackend, build_message
+
+# Тестовая зависимость: без aiosmtpd эти тесты пропускаются, а не ломают сбор всего набора
+Controller = pytest.importorskip("aiosmtpd.controller").Controller
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.envelopes = []
+        self.sessions = set()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.envelopes.append(envelope)
+        self.sessions.add(id(session))
+        return "250 OK"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server(monkeypatch):
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    monkeypatch.setenv("SMTP_HOST", controller.hostname)
+    monkeypatch.setenv("SMTP_PORT", str(controller.port))
+    monkeypatch.setenv("SMTP_STARTTLS", "false")
+    monkeypatch.setenv("MAIL_FROM", "noreply@example.com")
+    yield handler
+    controller.stop()
+
+
+def test_smtp_backend_delivers_message(smtp_server):
+    backend = SMTPBackend()
+    try:
+        backend.send(build_message("alice@example.com", "Invitation", "Click to accept"))
+    finally:
+        backend.close()
+
+    assert len(smtp_server.envelopes) == 1
+    envelope = smtp_server.envelopes[0]
+    assert envelope.mail_from == "noreply@example.com"
+    assert envelope.rcpt_tos == ["alice@example.com"]
+    content = envelope.content.decode()
+    assert "Subject: Invitation" in content
+    assert "From: noreply@example.com" in content
+    assert "To: alice@example.com" in content
+    assert "Click to accept" in content
+
+
+def test_smtp_backend_reuses_connection(smtp_server):
+    backend = SMTPBackend()
+    try:
+        for index in range(3):
+            backend.send(build_message(f"user{index}@example.com", "Invitation", "Click to accept"))
+    finally:
+        backend.close()
+
+    assert [envelope.rcpt_tos for envelope in smtp_server.envelopes] == [
+        [f"user{index}@example.com"] for index in range(3)
+    ]
+    assert len(smtp_server.sessions) == 1
+
+
+def test_outbox_delivers_invite_over_smtp(smtp_server, client, register):
+    from outbox.services import deliver_pending_emails
+    from utils.emails import MemoryBackend, set_mail_backend
+
+    _, headers, _ = register()
+    register("smtpinvitee")
+    project_id = client.post("/create-project", json={"name": "Mail"}, headers=headers).json()["project_id"]
+    response = client.post(f"/projects/{project_id}/invite", json={"email": "smtpinvitee@example.com"}, headers=headers)
+    assert response.status_code == 200
+
+    set_mail_backend(SMTPBackend())
+    try:
+        deliver_pending_emails()
+    finally:
+        set_mail_backend(MemoryBackend())
+
+    envelopes = [envelope for envelope in smtp_server.envelopes if envelope.rcpt_tos == ["smtpinvitee@example.com"]]
+    assert len(envelopes) == 1
+    assert "Subject: Invitation to join team Mail" in envelopes[0].content.decode()
@@ -0,0 +1,52 @@
+from sqlalchemy import select
+from outbox.models import OutboxEmail
+from utils.helpers import encode_token, ACCESS_TOKEN_TTL
+
+
+def invite(client, db, headers, email):
+    project_id = client.post("/create-project", json={"name": "Invites"}, headers=headers).json()["project_id"]
+    assert client.post(f"/projects/{project_id}/invite", json={"email": email}, headers=headers).status_code == 200
+    body = db.scalars(
+        select(OutboxEmail.body).where(OutboxEmail.to_email == email).order_by(OutboxEmail.id.desc())
+    ).first()
+    return project_id, body.rsplit("token=", 1)[1]
+
+
+def test_invite_token_is_not_a_bearer_token(client, db, register):
+    _, owner_headers, _ = register()
+    register("invitebearer")
+    project_id, token = invite(client, db, owner_headers, "invitebearer@example.com")
+
+    response = client.get(f"/projects/{project_id}/summary", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 403
+
+
+def test_invite_token_accepts_its_invite(client, db, register):
+    _, owner_headers, _ = register()
+    _, invitee_headers, _ = register("inviteaccept")
+    project_id, token = invite(client, db, owner_headers, "inviteaccept@example.com")
+
+    assert client.post("/projects/accept-invite", json={"token": token}, headers=invitee_headers).status_code == 200
+    assert client.get(f"/projects/{project_id}/summary", headers=invitee_headers).status_code == 200
+
+
+def test_invite_token_is_bound_to_invitee_and_project(client, db, register):
+    _, owner_headers, _ = register()
+    _, invitee_headers, _ = register("invitebound")
+    _, other_headers, _ = register()
+    project_id, token = invite(client, db, owner_headers, "invitebound@example.com")
+
+    response = client.post("/projects/accept-invite", json={"token": token}, headers=other_headers)
+    assert response.status_code == 403
+    response = client.post("/projects/accept-invite", json={"token": token, "project_id": project_id + 1000}, headers=invitee_headers)
+    assert response.status_code == 403
+
+
+def test_access_token_without_session_is_rejected(client, register):
+    user_id, _, _ = register()
+    token = encode_token(user_id, 0, "access", ACCESS_TOKEN_TTL)
+
+    response = client.post("/create-project", json={"name": "No session"}, headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 403
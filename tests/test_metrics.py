@@ -0,0 +1,64 @@
+import pytest
+from core.scheduler import PeriodicJob, scheduler
+from utils import permissions
+
+SERVICE_ENDPOINTS = ["/db/pool", "/activity-log/stats", "/scheduler/stats", "/project-purge/stats", "/metrics"]
+
+
+@pytest.fixture
+def admin_headers(register, make_admin):
+    user_id, headers, _ = register()
+    make_admin(user_id)
+    return headers
+
+
+def test_metrics_export_job_durations(client, admin_headers):
+    job = scheduler.add(PeriodicJob("metrics-test", lambda: 1, interval=60))
+    try:
+        job.run_once()
+        job.run_once()
+        body = client.get("/metrics", headers=admin_headers).text
+    finally:
+        del scheduler.jobs[job.name]
+
+    assert "# TYPE scheduler_job_duration_seconds histogram" in body
+    assert 'scheduler_job_duration_seconds_count{job="metrics-test"} 2' in body
+    assert 'scheduler_job_duration_seconds_bucket{job="metrics-test",le="+Inf"} 2' in body
+    for name in ("last_duration_seconds", "last_run_timestamp_seconds", "last_success_timestamp_seconds"):
+        assert f'scheduler_job_{name}{{job="metrics-test"}}' in body
+
+
+def test_failed_job_has_no_success_timestamp(client, admin_headers):
+    def fail():
+        raise RuntimeError("boom")
+
+    job = scheduler.add(PeriodicJob("metrics-failing", fail, interval=60))
+    try:
+        job.run_once()
+        body = client.get("/metrics", headers=admin_headers).text
+    finally:
+        del scheduler.jobs[job.name]
+
+    assert 'scheduler_job_failures_total{job="metrics-failing"} 1' in body
+    assert 'scheduler_job_last_run_timestamp_seconds{job="metrics-failing"}' in body
+    assert 'scheduler_job_last_success_timestamp_seconds{job="metrics-failing"}' not in body
+
+
+@pytest.mark.parametrize("path", SERVICE_ENDPOINTS)
+def test_service_endpoints_require_an_admin(client, register, admin_headers, path):
+    _, user_headers, _ = register()
+
+    assert client.get(path).status_code in (401, 403)
+    assert client.get(path, headers=user_headers).status_code == 403
+    assert client.get(path, headers=admin_headers).status_code == 200
+
+
+def test_service_token_grants_access(client, monkeypatch):
+    monkeypatch.setattr(permissions, "SERVICE_TOKEN", "scrape-secret")
+
+    assert client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"}).status_code == 200
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 403
+
+
+def test_health_checks_stay_public(client):
+    assert client.get("/health/live").status_code == 200
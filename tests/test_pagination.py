@@ -0,0 +1,98 @@
+import json
+from comments.models import Comment
+from tasks.models import Task
+from users.models import User
+
+
+def create_project(client, headers):
+    return client.post("/create-project", json={"name": "Pagination"}, headers=headers).json()["project_id"]
+
+
+def add_tasks(db, project_id, author_id, count):
+    tasks = [Task(title=f"task {index}", project_id=project_id, author_id=author_id) for index in range(count)]
+    db.add_all(tasks)
+    db.commit()
+    return [task.id for task in tasks]
+
+
+def walk(client, url, headers, limit):
+    pages, cursor = [], None
+    while True:
+        params = {"limit": limit} if cursor is None else {"limit": limit, "cursor": cursor}
+        page = client.get(url, params=params, headers=headers).json()
+        pages.append(page)
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_task_pages_cover_every_live_task_once(client, db, register):
+    user_id, headers, _ = register()
+    project_id = create_project(client, headers)
+    task_ids = add_tasks(db, project_id, user_id, 8)
+    deleted = db.get(Task, task_ids[3])
+    deleted.is_deleted = True
+    db.commit()
+
+    pages = walk(client, f"/projects/{project_id}/tasks", headers, limit=3)
+
+    assert [len(page["items"]) for page in pages] == [3, 3, 1]
+    assert [item["id"] for page in pages for item in page["items"]] == task_ids[:3] + task_ids[4:]
+    assert all(page["next_cursor"] == page["items"][-1]["id"] for page in pages[:-1])
+
+
+def test_full_last_page_has_no_next_cursor(client, db, register):
+    user_id, headers, _ = register()
+    project_id = create_project(client, headers)
+    add_tasks(db, project_id, user_id, 6)
+
+    pages = walk(client, f"/projects/{project_id}/tasks", headers, limit=3)
+
+    assert [len(page["items"]) for page in pages] == [3, 3]
+    assert pages[-1]["next_cursor"] is None
+
+
+def test_comment_pages_cover_every_comment_once(client, db, register):
+    user_id, headers, _ = register()
+    project_id = create_project(client, headers)
+    task_id, = add_tasks(db, project_id, user_id, 1)
+    comments = [Comment(text=f"comment {index}", task_id=task_id, author_id=user_id) for index in range(5)]
+    db.add_all(comments)
+    db.commit()
+
+    pages = walk(client, f"/projects/{project_id}/tasks/{task_id}/comments", headers, limit=2)
+
+    assert [item["id"] for page in pages for item in page["items"]] == [comment.id for comment in comments]
+    assert pages[-1]["next_cursor"] is None
+
+
+def test_stream_returns_one_json_line_per_task(client, db, register):
+    user_id, headers, _ = register()
+    project_id = create_project(client, headers)
+    task_ids = add_tasks(db, project_id, user_id, 4)
+    db.add(Comment(text="comment", task_id=task_ids[0], author_id=user_id))
+    db.commit()
+
+    response = client.get(f"/projects/{project_id}/tasks", params={"stream": "true"}, headers=headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.text.endswith("\n")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == task_ids
+    assert rows[0]["comment_count"] == 1 and rows[0]["status"] == "new"
+
+
+def test_stream_returns_one_json_line_per_comment(client, db, register):
+    user_id, headers, _ = register()
+    project_id = create_project(client, headers)
+    task_id, = add_tasks(db, project_id, user_id, 1)
+    comments = [Comment(text=f"comment {index}", task_id=task_id, author_id=user_id) for index in range(3)]
+    db.add_all(comments)
+    db.commit()
+
+    response = client.get(f"/projects/{project_id}/tasks/{task_id}/comments", params={"stream": "true"}, headers=headers)
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == [comment.id for comment in comments]
+    assert {row["author"] for row in rows} == {db.get(User, user_id).username}
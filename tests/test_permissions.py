@@ -0,0 +1,28 @@
+from sqlalchemy import delete
+from projects.models import ProjectUserRole, MembershipStatus
+from roles.services import role_registry
+
+
+def test_write_routes_do_not_trust_the_access_cache(client, db, register):
+    _, owner_headers, _ = register()
+    manager_id, manager_headers, _ = register()
+    register("cachedinvitee")
+    project_id = client.post("/create-project", json={"name": "Cache"}, headers=owner_headers).json()["project_id"]
+    db.add(ProjectUserRole(
+        user_id=manager_id, project_id=project_id,
+        role_id=role_registry.ids["owner"], status=MembershipStatus.accepted
+    ))
+    db.commit()
+    assert client.get(f"/projects/{project_id}/summary", headers=manager_headers).status_code == 200
+
+    # Участника удалили через другой воркер, здесь его права остались в кэше
+    db.execute(delete(ProjectUserRole).where(
+        ProjectUserRole.user_id == manager_id, ProjectUserRole.project_id == project_id
+    ))
+    db.commit()
+
+    # Чтение в пределах PERMISSION_CACHE_TTL еще проходит, изменения - уже нет
+    assert client.get(f"/projects/{project_id}/summary", headers=manager_headers).status_code == 200
+    response = client.post(f"/projects/{project_id}/invite", json={"email": "cachedinvitee@example.com"}, headers=manager_headers)
+    assert response.status_code == 403
+    assert client.delete(f"/projects/{project_id}", headers=manager_headers).status_code == 403
@@ -0,0 +1,47 @@
+from sqlalchemy import delete, update, select, func
+from comments.models import Comment
+from projects.models import Project
+from projects.services import purge_deleted_projects
+from tasks.models import Task
+
+
+def test_deleted_project_is_not_found_despite_cached_access(client, db, register):
+    _, headers, _ = register()
+    project_id = client.post("/create-project", json={"name": "Stale"}, headers=headers).json()["project_id"]
+    assert client.get(f"/projects/{project_id}", headers=headers).status_code == 200
+
+    # Проект удалили через другой воркер: кэш прав этого воркера об этом не знает
+    db.execute(update(Project).where(Project.id == project_id).values(is_deleted=True))
+    db.commit()
+    for method, path in (("GET", ""), ("GET", "/summary"), ("DELETE", "")):
+        assert client.request(method, f"/projects/{project_id}{path}", headers=headers).status_code == 404
+
+    # И после фонового purge, когда строки уже нет
+    db.execute(delete(Project).where(Project.id == project_id))
+    db.commit()
+    for method, path in (("GET", ""), ("GET", "/summary"), ("DELETE", "")):
+        assert client.request(method, f"/projects/{project_id}{path}", headers=headers).status_code == 404
+
+
+def test_delete_project_hands_rows_to_the_background_purge(client, db, register):
+    user_id, headers, _ = register()
+    project_id = client.post("/create-project", json={"name": "Gone"}, headers=headers).json()["project_id"]
+    task = Task(title="task", project_id=project_id, author_id=user_id)
+    db.add(task)
+    db.flush()
+    db.add_all([Comment(text="comment", task_id=task.id, author_id=user_id) for _ in range(5)])
+    db.commit()
+    task_id = task.id
+
+    response = client.delete(f"/projects/{project_id}", headers=headers)
+
+    assert response.json() == {"message": "Project 'Gone' deleted, its data will be removed in the background"}
+    # Запрос только помечает проект, строки удаляет фоновый purge
+    assert db.scalar(select(func.count()).select_from(Comment).where(Comment.task_id == task_id)) == 5
+    assert client.get(f"/projects/{project_id}", headers=headers).status_code == 404
+    assert client.delete(f"/projects/{project_id}", headers=headers).status_code == 404
+
+    assert purge_deleted_projects() >= 1
+    db.expire_all()
+    assert db.get(Project, project_id) is None
+    assert db.scalar(select(func.count()).select_from(Comment).where(Comment.task_id == task_id)) == 0
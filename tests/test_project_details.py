@@ -0,0 +1,49 @@
+from tasks.models import Task
+from comments.models import Comment
+
+
+def create_project(client, headers, db, author_id, tasks, comments_per_task=0):
+    project_id = client.post("/create-project", json={"name": "Project"}, headers=headers).json()["project_id"]
+    for index in range(tasks):
+        task = Task(title=f"task {index}", project_id=project_id, author_id=author_id)
+        db.add(task)
+        db.flush()
+        db.add_all([Comment(text="comment", task_id=task.id, author_id=author_id) for _ in range(comments_per_task)])
+    db.commit()
+    return project_id
+
+
+def test_project_details_statement_count_does_not_grow(client, db, register, count_statements):
+    user_id, headers, _ = register()
+    projects = {
+        "one task": (create_project(client, headers, db, user_id, 1), 1, 0),
+        "many tasks": (create_project(client, headers, db, user_id, 30), 30, 0),
+        "tasks with comments": (create_project(client, headers, db, user_id, 40, 3), 40, 3),
+    }
+
+    counts = {}
+    for name, (project_id, tasks, comments_per_task) in projects.items():
+        # Прогрев кэшей авторизации и прав: считаем только загрузку деталей
+        assert client.get(f"/projects/{project_id}/summary", headers=headers).status_code == 200
+        with count_statements() as statements:
+            response = client.get(f"/projects/{project_id}", headers=headers)
+        assert response.status_code == 200
+        body = response.json()
+        assert len(body["tasks"]) == tasks
+        assert sum(len(task["comments"]) for task in body["tasks"]) == tasks * comments_per_task
+        counts[name] = len(statements)
+
+    # Без N+1: число запросов не зависит ни от задач, ни от комментариев
+    assert len(set(counts.values())) == 1, counts
+
+
+def test_project_details_not_modified_runs_no_loading_queries(client, db, register, count_statements):
+    user_id, headers, _ = register()
+    project_id = create_project(client, headers, db, user_id, 5, 2)
+    etag = client.get(f"/projects/{project_id}", headers=headers).headers["ETag"]
+
+    with count_statements() as statements:
+        response = client.get(f"/projects/{project_id}", headers={**headers, "If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert not any("FROM tasks" in statement or "FROM comments" in statement for statement in statements)
@@ -0,0 +1,35 @@
+import os
+import subprocess
+import sys
+import pytest
+from benchmarks.query_plans import FULL_SCAN
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize("detail", [
+    "SCAN comments",
+    "SCAN comments USING INDEX ix_comments_task_id_live",
+    "SCAN tasks USING COVERING INDEX ix_tasks_project_id_live",
+    "SCAN project_user_roles LEFT-JOIN",
+])
+def test_full_scan_detects_every_scan_of_a_table(detail):
+    assert FULL_SCAN.match(detail)
+
+
+@pytest.mark.parametrize("detail", [
+    "SCAN search_index VIRTUAL TABLE INDEX 0:M3",
+    "SEARCH comments USING INDEX ix_comments_task_id_live (task_id=?)",
+    "SEARCH users USING INTEGER PRIMARY KEY (rowid=?)",
+])
+def test_full_scan_ignores_index_lookups(detail):
+    assert not FULL_SCAN.match(detail)
+
+
+def test_hot_endpoints_do_not_scan_tables():
+    # Отдельный процесс: скрипт поднимает приложение на собственной базе
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.query_plans", "--projects", "3", "--tasks", "200", "--members", "5"],
+        cwd=ROOT, capture_output=True, text=True, timeout=300
+    )
+    assert result.returncode == 0, result.stdout[-5000:] + result.stderr[-2000:]
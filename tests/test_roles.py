@@ -0,0 +1,68 @@
+from sqlalchemy import select, update
+from core.models import CacheVersion
+from projects.models import ProjectUserRole, MembershipStatus
+from roles.models import Permission, Role, role_permissions
+from utils.permissions import permission_table, PERMISSIONS_VERSION, PERMISSION_TABLE_TTL
+
+
+def permission_ids(db, *names):
+    return list(db.scalars(select(Permission.id).where(Permission.name.in_(names))))
+
+
+def test_member_cannot_create_roles(client, db, register):
+    _, headers, _ = register()
+
+    response = client.post("/create_role", headers=headers, json={
+        "name": "member", "description": "", "permissions": permission_ids(db, "delete_projects")
+    })
+
+    assert response.status_code == 403
+    member_role_id = db.scalar(select(Role.id).where(Role.name == "member"))
+    assert not permission_table.allows(permission_table.role_masks[member_role_id], "delete_projects")
+
+
+def test_builtin_roles_are_read_only(client, db, register, make_admin):
+    user_id, headers, _ = register()
+    make_admin(user_id)
+
+    for name in ("member", "owner"):
+        response = client.post("/create_role", headers=headers, json={
+            "name": name, "description": "", "permissions": permission_ids(db, "delete_projects")
+        })
+        assert response.status_code == 403
+
+
+def test_admin_creates_role(client, db, register, make_admin):
+    user_id, headers, _ = register()
+    make_admin(user_id)
+    payload = {"name": "auditor", "description": "Reads everything", "permissions": permission_ids(db, "read_projects", "read_tasks")}
+
+    assert client.post("/create_role", headers=headers, json=payload).status_code == 201
+    # Повторный вызов с теми же правами не дублирует связи
+    assert client.post("/create_role", headers=headers, json=payload).status_code == 201
+
+    role_id = db.scalar(select(Role.id).where(Role.name == "auditor"))
+    assert permission_table.allows(permission_table.role_masks[role_id], "read_tasks")
+    assert not permission_table.allows(permission_table.role_masks[role_id], "delete_tasks")
+
+
+def test_role_change_in_another_worker_is_picked_up(client, db, register):
+    owner_id, owner_headers, _ = register()
+    member_id, member_headers, _ = register()
+    project_id = client.post("/create-project", json={"name": "Roles"}, headers=owner_headers).json()["project_id"]
+    role = Role(name="observer", description="")
+    db.add(role)
+    db.flush()
+    db.add(ProjectUserRole(user_id=member_id, project_id=project_id, role_id=role.id, status=MembershipStatus.accepted))
+    db.commit()
+    assert client.get(f"/projects/{project_id}/summary", headers=member_headers).status_code == 403
+
+    # Другой воркер выдает роли право и увеличивает версию; здесь таблица прав еще старая
+    db.execute(role_permissions.insert().values(role_id=role.id, permission_id=permission_ids(db, "read_projects")[0]))
+    db.execute(update(CacheVersion).where(CacheVersion.name == PERMISSIONS_VERSION).values(version=CacheVersion.version + 1))
+    db.commit()
+    assert client.get(f"/projects/{project_id}/summary", headers=member_headers).status_code == 403
+
+    # Истек PERMISSION_TABLE_TTL: версия в базе новее, таблица и кэш доступа перечитываются
+    permission_table.checked_at -= PERMISSION_TABLE_TTL
+    assert client.get(f"/projects/{project_id}/summary", headers=member_headers).status_code == 200
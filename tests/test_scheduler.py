@@ -0,0 +1,31 @@
+import threading
+import time
+from core.scheduler import LeaderLease, PeriodicJob
+
+
+def test_trigger_runs_the_job_before_the_interval():
+    ran = threading.Event()
+    job = PeriodicJob("trigger-test", ran.set, interval=3600)
+    job.start()
+    try:
+        job.trigger()
+        assert ran.wait(5)
+    finally:
+        job.stop(timeout=5)
+    assert job.runs == 1
+
+
+def test_leader_keeps_the_lease_during_a_long_run(app, monkeypatch):
+    rival = LeaderLease("long-run-test", ttl=0.6)
+    monkeypatch.setattr(LeaderLease, "holder", property(lambda lease: "rival" if lease is rival else "leader"))
+    rival_acquired = []
+
+    def long_run():
+        time.sleep(1.5)
+        rival_acquired.append(rival.acquire())
+
+    job = PeriodicJob("long-run-test", long_run, interval=0.3, leader=True)
+    job.run_once()
+
+    assert job.runs == 1 and job.failures == 0
+    assert rival_acquired == [False]
@@ -0,0 +1,108 @@
+from sqlalchemy import select
+from comments.models import Comment
+from projects.models import ProjectUserRole, MembershipStatus
+from roles.models import Permission, Role
+from tasks.models import Task
+from utils.permissions import load_permission_table
+
+
+def create_project(client, headers):
+    return client.post("/create-project", json={"name": "Search"}, headers=headers).json()["project_id"]
+
+
+def add_task(db, project_id, title, description=None, is_deleted=False):
+    task = Task(title=title, description=description, project_id=project_id, is_deleted=is_deleted)
+    db.add(task)
+    db.commit()
+    return task
+
+
+def add_comment(db, task, author_id, text, is_deleted=False):
+    comment = Comment(text=text, task_id=task.id, author_id=author_id, is_deleted=is_deleted)
+    db.add(comment)
+    db.commit()
+    return comment
+
+
+def search(client, project_id, headers, q):
+    return client.get(f"/projects/{project_id}/search", params={"q": q}, headers=headers)
+
+
+def test_title_match_ranks_above_body_match(client, db, register):
+    user_id, headers, _ = register()
+    project_id = create_project(client, headers)
+    in_body = add_task(db, project_id, "Quarterly report", "mention the zeppelin once")
+    in_title = add_task(db, project_id, "Zeppelin launch", "plan the flight")
+
+    items = search(client, project_id, headers, "zeppelin").json()["items"]
+
+    assert [(item["type"], item["id"]) for item in items] == [("task", in_title.id), ("task", in_body.id)]
+
+
+def test_soft_deleted_tasks_and_comments_are_not_found(client, db, register):
+    user_id, headers, _ = register()
+    project_id = create_project(client, headers)
+    live = add_task(db, project_id, "Walrus feeding")
+    add_task(db, project_id, "Walrus cleanup", is_deleted=True)
+    live_comment = add_comment(db, live, user_id, "the walrus is hungry")
+    add_comment(db, live, user_id, "walrus again", is_deleted=True)
+    removed = add_task(db, project_id, "Old walrus task")
+    add_comment(db, removed, user_id, "walrus on a task that goes away")
+    removed.is_deleted = True
+    db.commit()
+
+    items = search(client, project_id, headers, "walrus").json()["items"]
+
+    assert sorted((item["type"], item["id"]) for item in items) == [("comment", live_comment.id), ("task", live.id)]
+
+
+def test_comments_are_hidden_without_read_comments(client, db, register):
+    _, owner_headers, _ = register()
+    reader_id, reader_headers, _ = register()
+    project_id = create_project(client, owner_headers)
+    task = add_task(db, project_id, "Narwhal migration")
+    add_comment(db, task, reader_id, "narwhal sighting")
+    role = Role(name="task-reader", description="", permissions=list(
+        db.scalars(select(Permission).where(Permission.name.in_(["read_projects", "read_tasks"])))
+    ))
+    db.add(role)
+    db.flush()
+    db.add(ProjectUserRole(user_id=reader_id, project_id=project_id, role_id=role.id, status=MembershipStatus.accepted))
+    db.commit()
+    load_permission_table()
+
+    owner_items = search(client, project_id, owner_headers, "narwhal").json()["items"]
+    reader_items = search(client, project_id, reader_headers, "narwhal").json()["items"]
+
+    assert {item["type"] for item in owner_items} == {"task", "comment"}
+    assert [item["type"] for item in reader_items] == ["task"]
+
+
+def test_non_member_gets_403(client, db, register):
+    _, owner_headers, _ = register()
+    _, stranger_headers, _ = register()
+    project_id = create_project(client, owner_headers)
+    add_task(db, project_id, "Secret okapi")
+
+    assert search(client, project_id, stranger_headers, "okapi").status_code == 403
+
+
+def test_whitespace_query_returns_nothing(client, db, register):
+    _, headers, _ = register()
+    project_id = create_project(client, headers)
+    add_task(db, project_id, "Anything")
+
+    response = search(client, project_id, headers, "   ")
+
+    assert response.status_code == 200
+    assert response.json() == {"items": [], "next_cursor": None}
+
+
+def test_query_syntax_is_not_interpreted(client, db, register):
+    _, headers, _ = register()
+    project_id = create_project(client, headers)
+    add_task(db, project_id, "Ibis nest")
+
+    response = search(client, project_id, headers, 'ibis" OR "*')
+
+    assert response.status_code == 200
@@ -0,0 +1,26 @@
+from core import server
+from core.server import Master
+
+
+def make_master():
+    return Master("main:app", "127.0.0.1", 0, workers=2, graceful_timeout=1)
+
+
+def test_rapid_failures_back_off_and_give_up(monkeypatch):
+    monkeypatch.setattr(server, "RESPAWN_BACKOFF", 1)
+    monkeypatch.setattr(server, "RESPAWN_MAX_BACKOFF", 4)
+    monkeypatch.setattr(server, "MAX_RAPID_FAILURES", 5)
+    master = make_master()
+
+    assert [master.respawn_delay(0.1) for _ in range(5)] == [1, 2, 4, 4, None]
+
+
+def test_stable_worker_resets_the_backoff(monkeypatch):
+    monkeypatch.setattr(server, "WORKER_STABLE_TIME", 10)
+    master = make_master()
+    master.respawn_delay(0.1)
+    master.respawn_delay(0.1)
+
+    assert master.respawn_delay(60) == 0
+    assert master.rapid_failures == 0
+    assert master.respawn_delay(0.1) == server.RESPAWN_BACKOFF
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, false
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from core.database import Base
@@ -25,6 +25,10 @@ class User(Base):
     is_active = Column(Boolean, default=True)
     is_deleted = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Входит в каждый JWT; увеличение отзывает разом все выданные токены и сессии (utils.helpers.revoke_tokens)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
+    # Управление общими ролями (roles.routers); выдается вручную в базе
+    is_admin = Column(Boolean, nullable=False, default=False, server_default=false())
 
     owned_projects = relationship("Project", back_populates="owner")
     project_roles = relationship("ProjectUserRole", back_populates="user", cascade="all, delete-orphan")
@@ -34,10 +38,16 @@ class User(Base):
     activities = relationship("ActivityLog", back_populates="user")
 
 
+class UserSession(Base):
+    """One login; its id is the ``sid`` claim of the tokens issued for it.
 
-class BlacklistedToken(Base):
-    __tablename__ = "blacklisted_tokens"
+    Only the refresh token whose jti is stored here is accepted, and each
+    refresh replaces it.
+    """
+    __tablename__ = "user_sessions"
 
-    id = Column(Integer, primary_key=True, index=True)
-    token = Column(String, nullable=False)             
-    created_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    id = Column(String(32), primary_key=True)
+    user_id = Column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    refresh_jti = Column(String(32), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
@@ -1,41 +1,66 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from .shcemas import UserRegistrationSchema, UserLogoutSchema, UserLoginSchema, UserSchema
-from sqlalchemy.orm import Session
-from core.database import get_db
-from utils.helpers import is_authenticate, hash_password, verify_password, JWTBearer, generate_token
+from .shcemas import UserRegistrationSchema, UserLogoutSchema, UserLoginSchema, UserSchema, RefreshTokenSchema
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.database import get_async_db
+from utils.helpers import (
+    is_authenticate, hash_password, verify_and_update_password, run_password_hashing,
+    get_current_user, decode_jwt, JWTBearer, start_session, end_session, revoke_tokens, refresh_token_pair
+)
 # from typing import TYPE_CHECKING
 
 # if TYPE_CHECKING:
-from users.models import User, BlacklistedToken
+from users.models import User
 
 
 auth_router = APIRouter()
 
 @auth_router.post("/register", response_model = UserSchema, status_code=status.HTTP_201_CREATED)
-async def user_register(data: UserRegistrationSchema, db: Session = Depends(get_db)):
-    user = is_authenticate(data.username)
+async def user_register(data: UserRegistrationSchema, db: AsyncSession = Depends(get_async_db)):
+    user = await is_authenticate(data.username, db)
     if user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username already exists")
-    hashed_password = hash_password(data.password_hash)
+    hashed_password = await run_password_hashing(hash_password, data.password_hash)
     new_user = User(username=data.username, email = data.email, password_hash=hashed_password)
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     return new_user
 
 @auth_router.post("/login")
-async def user_login(data:UserLoginSchema, db:Session=Depends(get_db)):
-    user = is_authenticate(data.username)
-    if not user or not verify_password(data.password_hash, user.password_hash):
+async def user_login(data:UserLoginSchema, db:AsyncSession=Depends(get_async_db)):
+    user = await is_authenticate(data.username, db)
+    if not user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid credentials")
-    return generate_token(user.id)
+    valid, new_hash = await run_password_hashing(verify_and_update_password, data.password_hash, user.password_hash)
+    if not valid:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid credentials")
+    if new_hash:
+        user.password_hash = new_hash
+        await db.commit()
+    return await start_session(db, user)
+
+
+@auth_router.post("/token/refresh")
+async def refresh_token(data: RefreshTokenSchema, db: AsyncSession = Depends(get_async_db)):
+    tokens = await refresh_token_pair(db, data.refresh_token)
+    if tokens is None:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid token or expired token.")
+    return tokens
 
 
-@auth_router.post("/logout", dependencies=[Depends(JWTBearer())], status_code=status.HTTP_200_OK)
-async def user_logout(token:str,db:Session = Depends(get_db)):
-    blocked = BlacklistedToken(token=token)
-    db.add(blocked)
-    db.commit()
-    db.refresh(blocked)
+@auth_router.post("/logout", status_code=status.HTTP_200_OK)
+async def user_logout(token: str = Depends(JWTBearer()), db: AsyncSession = Depends(get_async_db)):
+    # Выход только из этой сессии: остальные устройства пользователя остаются залогинены
+    session_id = decode_jwt(token).get("sid")
+    if session_id is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Token is not bound to a session")
+    await end_session(db, session_id)
     return {"message":"logged out"}
 
+
+@auth_router.post("/logout-all", status_code=status.HTTP_200_OK)
+async def user_logout_all(current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    # Выход со всех устройств: access и refresh токены всех сессий перестают приниматься
+    await revoke_tokens(db, current_user.id)
+    return {"message":"logged out from all sessions"}
+
@@ -0,0 +1,31 @@
+from datetime import datetime
+from decouple import config
+from sqlalchemy import select, delete
+from core.database import SessionLocal
+from .models import UserSession
+
+
+SESSION_SWEEP_INTERVAL = config("SESSION_SWEEP_INTERVAL", default=3600, cast=int)
+SESSION_SWEEP_BATCH_SIZE = config("SESSION_SWEEP_BATCH_SIZE", default=1000, cast=int)
+
+
+def purge_expired_sessions():
+    """Deletes sessions whose refresh token has expired, in batches."""
+    purged = 0
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        while True:
+            expired_ids = (
+                select(UserSession.id)
+                .where(UserSession.expires_at <= now)
+                .limit(SESSION_SWEEP_BATCH_SIZE)
+                .scalar_subquery()
+            )
+            deleted = db.execute(delete(UserSession).where(UserSession.id.in_(expired_ids))).rowcount
+            db.commit()
+            purged += deleted
+            if deleted < SESSION_SWEEP_BATCH_SIZE:
+                return purged
+    finally:
+        db.close()
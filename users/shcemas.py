@@ -39,3 +39,7 @@ class UserOutSchema(BaseModel):
 
 class UserLogoutSchema(BaseModel):
     token: str
+
+
+class RefreshTokenSchema(BaseModel):
+    refresh_token: str
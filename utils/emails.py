@@ -1,32 +1,153 @@
-from dotenv import load_dotenv
+import logging
 import os
 import smtplib
+import threading
+import time
 from email.message import EmailMessage
+from decouple import config
 
-load_dotenv()
 
-SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
-SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
-SMTP_USER = os.getenv("SMTP_USER")
-SMTP_PASS = os.getenv("SMTP_PASS")
+logger = logging.getLogger(__name__)
 
-if not SMTP_USER or not SMTP_PASS:
-    raise RuntimeError("SMTP credentials not set")
 
+def build_invite_email(to_email: str, team_name: str, token: str):
+    link = f"http://localhost:8000/teams/accept-invite?token={token}"
+    return {
+        "to_email": to_email,
+        "subject": f"Invitation to join team {team_name}",
+        "body": f"Click to accept: {link}"
+    }
 
-def send_invite_email(to_email: str, team_name: str, token: str):
-    try:
-        link = f"http://localhost:8000/teams/accept-invite?token={token}"
-        msg = EmailMessage()
-        msg["Subject"] = f"Invitation to join team {team_name}"
-        msg["From"] = SMTP_USER
-        msg["To"] = to_email
-        msg.set_content(f"Click to accept: {link}")
 
-        with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as smtp:
+def build_message(to_email: str, subject: str, body: str):
+    msg = EmailMessage()
+    msg["Subject"] = subject
+    msg["From"] = config("MAIL_FROM", default=config("SMTP_USER", default="noreply@localhost"))
+    msg["To"] = to_email
+    msg.set_content(body)
+    return msg
+
+
+class SMTPBackend:
+    """Authenticated SMTP session reused across messages and batches."""
+
+    def __init__(self):
+        self.host = config("SMTP_HOST", default="smtp.gmail.com")
+        self.port = config("SMTP_PORT", default=587, cast=int)
+        self.user = config("SMTP_USER", default=None)
+        self.password = config("SMTP_PASS", default=None)
+        self.starttls = config("SMTP_STARTTLS", default=True, cast=bool)
+        self.timeout = config("SMTP_TIMEOUT", default=30, cast=int)
+        # Соединение, простоявшее дольше, закрывается: серверы рвут idle-сессии сами
+        self.idle_timeout = config("SMTP_IDLE_TIMEOUT", default=60, cast=int)
+        if self.user and not self.password:
+            raise RuntimeError("SMTP credentials not set")
+        self._smtp = None
+        self._last_used = 0.0
+
+    def _connect(self):
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
             smtp.starttls()
-            smtp.login(SMTP_USER, SMTP_PASS)
-            smtp.send_message(msg)
-    except Exception as e:
-        print(f"[ERROR] Failed to send email to {to_email}: {e}")
+        if self.user:
+            smtp.login(self.user, self.password)
+        return smtp
+
+    def send(self, msg: EmailMessage):
+        if self._smtp is not None and time.monotonic() - self._last_used > self.idle_timeout:
+            self.close()
+        if self._smtp is None:
+            self._smtp = self._connect()
+        try:
+            self._smtp.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # Сервер закрыл сессию между пачками: переподключаемся один раз
+            self._smtp = self._connect()
+            self._smtp.send_message(msg)
+        self._last_used = time.monotonic()
+
+    def close(self):
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except smtplib.SMTPException:
+            pass
+        except OSError:
+            pass
+        self._smtp = None
+
+
+class MemoryBackend:
+    """Keeps sent messages in ``outbox``; meant for tests."""
+
+    def __init__(self):
+        self.outbox = []
+
+    def send(self, msg: EmailMessage):
+        self.outbox.append(msg)
+
+    def close(self):
+        pass
+
+
+class ConsoleBackend:
+    def send(self, msg: EmailMessage):
+        logger.info("Email to %s: %s\n%s", msg["To"], msg["Subject"], msg.get_content())
+
+    def close(self):
+        pass
+
+
+class FileBackend:
+    """Appends every message to ``MAIL_FILE_PATH``."""
+
+    def __init__(self):
+        self.path = config("MAIL_FILE_PATH", default="./sent_emails.log")
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def send(self, msg: EmailMessage):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(msg.as_string())
+            f.write("\n")
+
+    def close(self):
+        pass
+
+
+MAIL_BACKENDS = {
+    "smtp": SMTPBackend,
+    "memory": MemoryBackend,
+    "console": ConsoleBackend,
+    "file": FileBackend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_mail_backend():
+    """Creates the backend named by ``MAIL_BACKEND`` on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                name = config("MAIL_BACKEND", default="smtp")
+                if name not in MAIL_BACKENDS:
+                    raise RuntimeError(f"Unknown MAIL_BACKEND '{name}'")
+                _backend = MAIL_BACKENDS[name]()
+    return _backend
+
+
+def set_mail_backend(backend):
+    global _backend
+    if _backend is not None:
+        _backend.close()
+    _backend = backend
+
 
+def close_mail_backend():
+    if _backend is not None:
+        _backend.close()
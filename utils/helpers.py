@@ -1,78 +1,284 @@
-from passlib.hash import bcrypt
+from passlib.context import CryptContext
 from decouple import config
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import threading
 import time
+import uuid
+from datetime import datetime, timedelta
 import jwt
 from fastapi import Request, HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from core.database import  SessionLocal
-from users.models import User, BlacklistedToken
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.database import get_async_db
+from users.models import User, UserSession
 from sqlalchemy.orm import selectinload
+from sqlalchemy import event, select, update, delete
 
 
 SECRET = config("SECRET")
 ALGORITHM = config("ALGORITHM")
+AUTH_CACHE_SIZE = config("AUTH_CACHE_SIZE", default=10000, cast=int)
+USER_CACHE_TTL = config("USER_CACHE_TTL", default=60, cast=int)
+# Сколько другой воркер может не видеть logout: версия токенов пользователя кэшируется на столько секунд
+TOKEN_VERSION_CACHE_TTL = config("TOKEN_VERSION_CACHE_TTL", default=5, cast=int)
+ACCESS_TOKEN_TTL = config("ACCESS_TOKEN_TTL", default=900, cast=int)
+REFRESH_TOKEN_TTL = config("REFRESH_TOKEN_TTL", default=30 * 24 * 3600, cast=int)
+INVITE_TOKEN_TTL = config("INVITE_TOKEN_TTL", default=7 * 24 * 3600, cast=int)
+BCRYPT_ROUNDS = config("BCRYPT_ROUNDS", default=12, cast=int)
+PASSWORD_HASH_WORKERS = config("PASSWORD_HASH_WORKERS", default=4, cast=int)
+
+# Хэши с другим cost-фактором считаются устаревшими и пересчитываются при логине
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+# bcrypt отпускает GIL, поэтому пул потоков дает реальный параллелизм;
+# размер пула ограничивает число одновременных хэширований
+_password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
+
+class TTLCache:
+    """Потокобезопасный LRU-кэш, у каждой записи свой срок жизни."""
+
+    def __init__(self, maxsize: int, ttl: float = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at < time.time():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, expires_at: float = None):
+        if expires_at is None and self.ttl is not None:
+            expires_at = time.time() + self.ttl
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+_payload_cache = TTLCache(AUTH_CACHE_SIZE)
+_user_cache = TTLCache(AUTH_CACHE_SIZE, ttl=USER_CACHE_TTL)
+# user_id -> users.token_version
+_token_versions = TTLCache(AUTH_CACHE_SIZE, ttl=TOKEN_VERSION_CACHE_TTL)
+# sid -> жива ли сессия; logout в другом воркере виден здесь через столько же секунд
+_sessions = TTLCache(AUTH_CACHE_SIZE, ttl=TOKEN_VERSION_CACHE_TTL)
 
 
 def hash_password(password):
-    return bcrypt.hash(password)
+    return pwd_context.hash(password)
 
 
 def verify_password(password, hashed_password):
-    return bcrypt.verify(password, hashed_password)
+    return pwd_context.verify(password, hashed_password)
 
 
-def is_authenticate(username):
-    db = SessionLocal()
-    try:
-        user = db.query(User).filter(User.username == username).first()
-        if user:
-            return user
-        return None
-    finally:
-        db.close()
+def verify_and_update_password(password, hashed_password):
+    return pwd_context.verify_and_update(password, hashed_password)
+
+
+async def run_password_hashing(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, func, *args)
+
 
+async def is_authenticate(username, db: AsyncSession):
+    user = (await db.execute(select(User).where(User.username == username))).scalar_one_or_none()
+    if user:
+        return user
+    return None
 
-def response_token(token:str):
+
+def response_token(access_token:str, refresh_token:str):
     return{
-        "access_token": token
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+        "expires_in": ACCESS_TOKEN_TTL
     }
-    
-    
-def generate_token(user_id:int):
+
+
+def encode_token(user_id:int, token_version:int, token_type:str, ttl:int, session_id:str = None, jti:str = None, claims:dict = None):
+    now = int(time.time())
     payload = {
-        "user_id" : user_id,
-        "expires": time.time() + 600
+        "user_id": user_id,
+        "ver": token_version,
+        "type": token_type,
+        "jti": jti or uuid.uuid4().hex,
+        "iat": now,
+        "exp": now + ttl
     }
-    token = jwt.encode(payload, key=SECRET, algorithm=ALGORITHM)
-    return response_token(token)
+    if session_id is not None:
+        payload["sid"] = session_id
+    if claims:
+        payload.update(claims)
+    return jwt.encode(payload, key=SECRET, algorithm=ALGORITHM)
+    
+    
+def generate_token(user_id:int, token_version:int, session_id:str, refresh_jti:str = None):
+    return response_token(
+        encode_token(user_id, token_version, "access", ACCESS_TOKEN_TTL, session_id),
+        encode_token(user_id, token_version, "refresh", REFRESH_TOKEN_TTL, session_id, refresh_jti)
+    )
+
+
+def generate_invite_token(user_id:int, token_version:int, project_id:int):
+    """Token for the invite email: it only accepts an invite to ``project_id`` and is not a bearer token."""
+    return encode_token(user_id, token_version, "invite", INVITE_TOKEN_TTL, claims={"project_id": project_id})
+
+
+def decode_invite_token(token:str):
+    try:
+        payload = decode_token(token)
+    except jwt.InvalidTokenError:
+        return None
+    if payload["type"] != "invite" or "project_id" not in payload:
+        return None
+    return payload
+
+
+def decode_token(token:str):
+    # exp проверяет сам PyJWT: просроченный токен - это InvalidTokenError
+    return jwt.decode(token, key=SECRET, algorithms=[ALGORITHM], options={"require": ["exp", "jti", "user_id", "ver", "type"]})
 
 
 def decode_jwt(token:str):
-    payload = jwt.decode(token, key=SECRET, algorithms=[ALGORITHM])
-    return payload if payload["expires"] >= time.time() else None
+    payload = _payload_cache.get(token)
+    if payload is None:
+        payload = decode_token(token)
+        _payload_cache.set(token, payload, expires_at=payload["exp"])
+    return payload if payload["exp"] >= time.time() else None
+
 
+async def get_token_version(db: AsyncSession, user_id:int):
+    version = _token_versions.get(user_id)
+    if version is None:
+        version = await db.scalar(select(User.token_version).where(User.id == user_id))
+        if version is not None:
+            _token_versions.set(user_id, version)
+    return version
 
-def is_token_bloked(token:str):
-    db = SessionLocal()
-    black_list_token = db.query(BlacklistedToken). filter(BlacklistedToken.token == token).first()
-    if black_list_token:
+
+async def is_session_active(db: AsyncSession, session_id:str):
+    active = _sessions.get(session_id)
+    if active is None:
+        active = await db.scalar(select(UserSession.id).where(UserSession.id == session_id)) is not None
+        _sessions.set(session_id, active)
+    return active
+
+
+async def is_token_revoked(token:str, db: AsyncSession):
+    # Сравнение с версией пользователя (logout-all) и проверка сессии (logout) вместо поиска по списку отозванных токенов
+    payload = decode_jwt(token)
+    if payload is None or payload["ver"] != await get_token_version(db, payload["user_id"]):
         return True
-    return False
+    return "sid" not in payload or not await is_session_active(db, payload["sid"])
+
+
+async def start_session(db: AsyncSession, user:User):
+    session = UserSession(
+        id=uuid.uuid4().hex,
+        user_id=user.id,
+        refresh_jti=uuid.uuid4().hex,
+        expires_at=datetime.utcnow() + timedelta(seconds=REFRESH_TOKEN_TTL)
+    )
+    db.add(session)
+    await db.commit()
+    return generate_token(user.id, user.token_version, session.id, session.refresh_jti)
+
+
+async def end_session(db: AsyncSession, session_id:str):
+    """Logs out one session: its access and refresh tokens stop being accepted."""
+    await db.execute(delete(UserSession).where(UserSession.id == session_id))
+    await db.commit()
+    _sessions.set(session_id, False)
+
+
+async def revoke_tokens(db: AsyncSession, user_id:int):
+    """Logs the user out everywhere: every token issued before stops being accepted."""
+    await db.execute(update(User).where(User.id == user_id).values(token_version=User.token_version + 1))
+    await db.execute(delete(UserSession).where(UserSession.user_id == user_id))
+    await db.commit()
+    _token_versions.pop(user_id)
+    _user_cache.pop(user_id)
+
+
+async def refresh_token_pair(db: AsyncSession, refresh_token:str):
+    """Exchanges a refresh token for a new pair; the old refresh token stops working."""
+    try:
+        payload = decode_token(refresh_token)
+    except jwt.InvalidTokenError:
+        return None
+    if payload["type"] != "refresh" or "sid" not in payload:
+        return None
+    # Мимо кэша: refresh редкий, а отозванная сессия не должна продлеваться ни на секунду
+    version = await db.scalar(select(User.token_version).where(User.id == payload["user_id"]))
+    if version is None or version != payload["ver"]:
+        return None
+
+    # Ротация: jti в сессии меняется условным UPDATE, поэтому из двух запросов
+    # с одним и тем же refresh-токеном новую пару получит только один
+    now = datetime.utcnow()
+    new_jti = uuid.uuid4().hex
+    rotated = await db.execute(
+        update(UserSession)
+        .where(
+            UserSession.id == payload["sid"],
+            UserSession.user_id == payload["user_id"],
+            UserSession.refresh_jti == payload["jti"],
+            UserSession.expires_at > now
+        )
+        .values(refresh_jti=new_jti, expires_at=now + timedelta(seconds=REFRESH_TOKEN_TTL))
+    )
+    if rotated.rowcount != 1:
+        # Уже обмененный refresh-токен предъявлен снова: его могли украсть, закрываем всю сессию
+        await end_session(db, payload["sid"])
+        return None
+    await db.commit()
+    _token_versions.set(payload["user_id"], version)
+    return generate_token(payload["user_id"], version, payload["sid"], new_jti)
         
         
 class JWTBearer(HTTPBearer):
     def __init__(self, auto_error: bool = True):
         super(JWTBearer, self).__init__(auto_error=auto_error)
 
-    async def __call__(self, request: Request):
+    async def __call__(self, request: Request, db: AsyncSession = Depends(get_async_db)):
         credentials: HTTPAuthorizationCredentials = await super(JWTBearer, self).__call__(request)
         if credentials:
             if not credentials.scheme == "Bearer":
                 raise HTTPException(status_code=403, detail="Invalid authentication scheme.")
-            if is_token_bloked(credentials.credentials):
-                raise HTTPException(status_code=403, detail="Invalid authentication scheme.")
             if not self.verify_jwt(credentials.credentials):
                 raise HTTPException(status_code=403, detail="Invalid token or expired token.")
+            if await is_token_revoked(credentials.credentials, db):
+                raise HTTPException(status_code=403, detail="Token has been revoked.")
             return credentials.credentials
         else:
             raise HTTPException(status_code=403, detail="Invalid authorization code.")
@@ -84,16 +290,30 @@ class JWTBearer(HTTPBearer):
             payload = decode_jwt(jwtoken)
         except:
             payload = None
-        if payload:
+        if payload and payload["type"] == "access":
             isTokenValid = True
 
         return isTokenValid
 
 
-def get_current_user(token:str = Depends(JWTBearer())):
-    db = SessionLocal()
+async def get_current_user(token:str = Depends(JWTBearer()), db: AsyncSession = Depends(get_async_db)):
     pyload = decode_jwt(token)
     if pyload:
-        user = db.query(User).filter(User.id == pyload["user_id"]).first()
+        user = _user_cache.get(pyload["user_id"])
+        if user is None:
+            user = await db.get(User, pyload["user_id"])
+            if user:
+                # Отвязываем от сессии запроса: commit в роутере не должен
+                # экспайрить закэшированный объект
+                db.expunge(user)
+                _user_cache.set(user.id, user)
         if user:
+            # Автор изменений для журнала активности (activity_logs.services)
+            db.info["actor_id"] = user.id
             return user
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def invalidate_cached_user(mapper, connection, target):
+    _user_cache.pop(target.id)
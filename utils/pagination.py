@@ -0,0 +1,30 @@
+import orjson
+from fastapi.responses import StreamingResponse
+from core.database import AsyncSessionLocal
+
+
+STREAM_BATCH_SIZE = 500
+
+
+async def paginate(db, statement, id_column, cursor, limit, serialize):
+    if cursor is not None:
+        statement = statement.where(id_column > cursor)
+    rows = (await db.execute(statement.order_by(id_column).limit(limit + 1))).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "items": [serialize(row) for row in rows],
+        "next_cursor": rows[-1].id if has_more else None
+    }
+
+
+def ndjson_response(statement, serialize):
+    # Генератор работает со своей сессией: сессия из get_async_db закрывается
+    # раньше, чем StreamingResponse дочитает курсор
+    async def generate():
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(statement.execution_options(yield_per=STREAM_BATCH_SIZE))
+            async for row in result:
+                yield orjson.dumps(serialize(row), option=orjson.OPT_APPEND_NEWLINE)
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
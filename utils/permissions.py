@@ -1,9 +1,16 @@
+import hmac
+import time
 from roles.models import Permission
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
+from decouple import config
+from sqlalchemy import select, update, and_
 from sqlalchemy.orm import Session
-from roles.models import Role
-from core.database import get_db
-from .helpers import get_current_user
+from sqlalchemy.ext.asyncio import AsyncSession
+from roles.models import Role, role_permissions
+from projects.models import Project, ProjectUserRole, MembershipStatus
+from core.database import get_async_db, SessionLocal, insert_ignore
+from core.models import CacheVersion
+from .helpers import get_current_user, JWTBearer, TTLCache
 
 
 def add_permissions(models,session):
@@ -17,10 +24,176 @@ def add_permissions(models,session):
                     "description": f"can {action} {model}"
                 }
             )
-    session.execute(Permission.__table__.insert(), permissions)  
+    insert_ignore(session, Permission.__table__, permissions, ["name"])
     session.commit()
 
 
+PERMISSION_CACHE_SIZE = config("PERMISSION_CACHE_SIZE", default=100000, cast=int)
+# Кэш прав свой у каждого воркера (core.server), изменения в других воркерах он не видит.
+# Поэтому участник, удаленный из проекта, или удаленный проект еще до PERMISSION_CACHE_TTL
+# секунд проходят проверки на чтение в других воркерах. Изменяющие маршруты кэш не читают
+# (require_permission(..., fresh=True)) и всегда проверяют права по базе
+PERMISSION_CACHE_TTL = config("PERMISSION_CACHE_TTL", default=60, cast=int)
+# Как часто воркер сверяет свою таблицу прав с cache_versions: дольше этого
+# изменение ролей, сделанное в другом воркере, здесь не видно
+PERMISSION_TABLE_TTL = config("PERMISSION_TABLE_TTL", default=5, cast=int)
+# Строка cache_versions, которую увеличивает каждое изменение ролей и прав
+PERMISSIONS_VERSION = "permissions"
+
+# Владелец проекта проходит любую проверку: -1 & bit != 0 для любого бита
+OWNER_MASK = -1
+
+
+class PermissionTable:
+    """Permission names compiled to bits and roles compiled to bitmasks."""
+
+    def __init__(self):
+        self.bits = {}
+        self.role_masks = {}
+        self.loaded = False
+        self.version = None
+        self.checked_at = 0.0
+
+    def load(self, session: Session):
+        version = session.scalar(select(CacheVersion.version).where(CacheVersion.name == PERMISSIONS_VERSION))
+        names = session.execute(select(Permission.id, Permission.name).order_by(Permission.id)).all()
+        bit_by_id = {permission_id: 1 << index for index, (permission_id, _) in enumerate(names)}
+        role_masks = {}
+        for role_id, permission_id in session.execute(select(role_permissions.c.role_id, role_permissions.c.permission_id)):
+            role_masks[role_id] = role_masks.get(role_id, 0) | bit_by_id.get(permission_id, 0)
+        self.bits = {name: bit_by_id[permission_id] for permission_id, name in names}
+        self.role_masks = role_masks
+        self.version = version
+        self.checked_at = time.monotonic()
+        self.loaded = True
+
+    def is_fresh(self):
+        return self.loaded and time.monotonic() - self.checked_at < PERMISSION_TABLE_TTL
+
+    def allows(self, mask: int, name: str):
+        if mask == OWNER_MASK:
+            return True
+        return bool(mask & self.bits.get(name, 0))
+
+
+permission_table = PermissionTable()
+# (user_id, project_id) -> маска прав; None в кэше не хранится
+_access_cache = TTLCache(PERMISSION_CACHE_SIZE, ttl=PERMISSION_CACHE_TTL)
+
+
+def load_permission_table():
+    db = SessionLocal()
+    try:
+        permission_table.load(db)
+    finally:
+        db.close()
+
+
+async def reload_permission_table(db: AsyncSession):
+    await db.run_sync(permission_table.load)
+    _access_cache.clear()
+
+
+async def refresh_permission_table(db: AsyncSession, force: bool = False):
+    """Reloads the table if roles changed in any worker; the version is checked once per PERMISSION_TABLE_TTL."""
+    if not force and permission_table.is_fresh():
+        return
+    version = await db.scalar(select(CacheVersion.version).where(CacheVersion.name == PERMISSIONS_VERSION))
+    if permission_table.loaded and version == permission_table.version:
+        permission_table.checked_at = time.monotonic()
+        return
+    await reload_permission_table(db)
+
+
+def bump_permissions_version():
+    return update(CacheVersion).where(CacheVersion.name == PERMISSIONS_VERSION).values(version=CacheVersion.version + 1)
+
+
+def invalidate_access(user_id: int, project_id: int):
+    _access_cache.pop((user_id, project_id))
+
+
+def clear_access_cache():
+    _access_cache.clear()
+
+
+async def resolve_access_mask(db: AsyncSession, user_id: int, project_id: int, fresh: bool = False):
+    """Access mask of the user in the project, None if there is no such project.
+
+    ``fresh`` skips the access cache and checks the role version right away.
+    """
+    await refresh_permission_table(db, force=fresh)
+    if not fresh:
+        mask = _access_cache.get((user_id, project_id))
+        if mask is not None:
+            return mask
+
+    row = (await db.execute(
+        select(Project.owner_id, ProjectUserRole.role_id, ProjectUserRole.status)
+        .outerjoin(ProjectUserRole, and_(
+            ProjectUserRole.project_id == Project.id,
+            ProjectUserRole.user_id == user_id
+        ))
+        .where(Project.id == project_id, Project.is_deleted == False)
+    )).first()
+    if row is None:
+        return None
+
+    owner_id, role_id, membership_status = row
+    if owner_id == user_id:
+        mask = OWNER_MASK
+    elif membership_status == MembershipStatus.accepted:
+        mask = permission_table.role_masks.get(role_id, 0)
+    else:
+        mask = 0
+    _access_cache.set((user_id, project_id), mask)
+    return mask
+
+
+async def ensure_permission(db: AsyncSession, user_id: int, project_id: int, permission: str, fresh: bool = False):
+    mask = await resolve_access_mask(db, user_id, project_id, fresh)
+    if mask is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+    if not permission_table.allows(mask, permission):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission for this action"
+        )
+    return mask
+
+
+async def require_admin(user = Depends(get_current_user)):
+    if user is None or not user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission for this action"
+        )
+    return user
+
+
+# Статический токен для мониторинга (Prometheus не умеет получать JWT); пустой - выключен
+SERVICE_TOKEN = config("SERVICE_TOKEN", default="")
+
+
+async def require_service_access(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Service endpoints: an admin's access token or ``Authorization: Bearer <SERVICE_TOKEN>``."""
+    authorization = request.headers.get("Authorization", "")
+    if SERVICE_TOKEN and hmac.compare_digest(authorization.encode(), f"Bearer {SERVICE_TOKEN}".encode()):
+        return None
+    token = await JWTBearer()(request, db)
+    return await require_admin(await get_current_user(token, db))
+
+
+def require_permission(permission: str, fresh: bool = False):
+    async def dependency(
+        project_id: int,
+        db: AsyncSession = Depends(get_async_db),
+        user = Depends(get_current_user)
+    ):
+        return await ensure_permission(db, user.id, project_id, permission, fresh)
+    return dependency
+
+
 
  
 